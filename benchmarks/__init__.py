@@ -0,0 +1,4 @@
+'''benchmarks for the warm-up generator and the index view
+
+Run with `python -m benchmarks.run --help`.
+'''
@@ -0,0 +1,70 @@
+'''synthetic movement catalogues for benchmarking'''
+
+import random
+import typing
+
+from sidekik import db, models, solvers
+
+
+class Catalogue(typing.NamedTuple):
+    '''Synthetic catalogue:
+
+    move_types list of movement type names
+    warmups dict of warm-up name to list of movement type names
+    workouts dict of workout name to list of warm-up names
+    '''
+    move_types: typing.List[str]
+    warmups: typing.Dict[str, typing.List[str]]
+    workouts: typing.Dict[str, typing.List[str]]
+
+    def coverage(self, work_names: typing.Iterable[str]) -> solvers.Coverage:
+        '''Returns solver Coverage of the warm-ups linked to work_names,
+        sorted by warm-up name as in the catalogue snapshot'''
+        warm_names = sorted(set(name for work_name in work_names for name in self.workouts[work_name]))
+        return solvers.encode_rows({name: self.warmups[name] for name in warm_names})
+
+
+def generate_catalogue(n_types: int = 9, n_warmups: int = 200, n_workouts: int = 50, 
+                       types_per_warmup: int = 2, warmups_per_workout: int = 15, 
+                       seed: int = 0) -> Catalogue:
+    '''Returns random Catalogue where each warm-up covers on average
+    types_per_warmup movement types and each workout links on average
+    warmups_per_workout warm-ups'''
+    rng = random.Random(seed)
+    move_types = [f"Type {ix}" for ix in range(n_types)]
+
+    warmups = {}
+    for ix in range(n_warmups):
+        n = min(max(1, round(rng.gauss(types_per_warmup, 1))), n_types)
+        warmups[f"Warm-up {ix}"] = sorted(rng.sample(move_types, n))
+
+    workouts = {}
+    warm_names = list(warmups)
+    for ix in range(n_workouts):
+        n = min(max(1, round(rng.gauss(warmups_per_workout, warmups_per_workout/4))), n_warmups)
+        workouts[f"Workout {ix}"] = sorted(rng.sample(warm_names, n))
+
+    return Catalogue(move_types, warmups, workouts)
+
+def load_catalogue(catalogue: Catalogue) -> None:
+    '''Inserts catalogue into db with bulk inserts, requires an app
+    context'''
+    db.session.execute(models.MoveType.__table__.insert(), 
+                       [{"name": name, "description": name} for name in catalogue.move_types])
+    db.session.execute(models.Warmup.__table__.insert(), [{"name": name} for name in catalogue.warmups])
+    db.session.execute(models.Workout.__table__.insert(), [{"name": name} for name in catalogue.workouts])
+
+    type_ids = {name: id for id, name in db.session.query(models.MoveType.id, models.MoveType.name)}
+    warm_ids = {name: id for id, name in db.session.query(models.Warmup.id, models.Warmup.name)}
+    work_ids = {name: id for id, name in db.session.query(models.Workout.id, models.Workout.name)}
+
+    db.session.execute(models.warm_types.insert(), [
+        {"move_type_id": type_ids[type_name], "warm_id": warm_ids[name]} 
+        for name, type_names in catalogue.warmups.items() for type_name in type_names
+    ])
+    db.session.execute(models.warm_work.insert(), [
+        {"warm_id": warm_ids[warm_name], "work_id": work_ids[name]}
+        for name, warm_names in catalogue.workouts.items() for warm_name in warm_names
+    ])
+    models.refresh_labels()
+    db.session.commit()
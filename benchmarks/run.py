@@ -0,0 +1,222 @@
+'''times the warm-up generator and the index view on a synthetic catalogue
+
+Example:
+    python -m benchmarks.run --warmups 500 --workouts 100 --output bench.json
+'''
+
+import argparse
+from datetime import datetime
+import json
+import networkx as nx
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import typing
+
+import sidekik
+from sidekik import catalogue as sidekik_catalogue
+from sidekik import config, db, movements, warmup_cache
+
+from benchmarks.catalogue import Catalogue, generate_catalogue, load_catalogue
+
+
+def main(argv: typing.List[str] = None) -> dict:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--types", type=int, default=9, help="number of movement types")
+    parser.add_argument("--warmups", type=int, default=200, help="number of warm-up movements")
+    parser.add_argument("--workouts", type=int, default=50, help="number of workout movements")
+    parser.add_argument("--types-per-warmup", type=float, default=2,
+                        help="mean movement types covered per warm-up")
+    parser.add_argument("--warmups-per-workout", type=float, default=15,
+                        help="mean warm-ups linked per workout")
+    parser.add_argument("--selection-size", type=int, default=2, help="workouts per warm-up request")
+    parser.add_argument("--engines", default="pandas,bitset,exact", help="comma separated solver engines")
+    parser.add_argument("--repeat", type=int, default=20, help="timed calls per benchmark")
+    parser.add_argument("--seed", type=int, default=0, help="seed for catalogue and selections")
+    parser.add_argument("--skip-views", action="store_true", help="skip timing POST / requests")
+    parser.add_argument("--output", help="write JSON results to this path instead of stdout")
+    args = parser.parse_args(argv)
+
+    catalogue = generate_catalogue(args.types, args.warmups, args.workouts, args.types_per_warmup,
+                                   args.warmups_per_workout, args.seed)
+    rng = random.Random(args.seed)
+    selections = [rng.sample(list(catalogue.workouts), args.selection_size) for _ in range(args.repeat)]
+
+    results = {
+        "commit": get_commit(),
+        "date": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "params": vars(args),
+        "benchmarks": {}
+    }
+    benchmarks = results["benchmarks"]
+
+    for engine in args.engines.split(","):
+        benchmarks[f"create_warmups[{engine}]"] = bench_engine(catalogue, selections, engine, args.seed)
+
+    benchmarks["remove_warmup_supersets"] = bench_supersets(catalogue, selections, args.seed)
+    benchmarks["get_par_nodes"] = bench_par_nodes(args.repeat)
+
+    if not args.skip_views:
+        benchmarks.update(bench_index(catalogue, selections, args.seed))
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as fout:
+            fout.write(output + "\n")
+    else:
+        print(output)
+
+    return results
+
+
+#benchmarks
+def bench_engine(catalogue: Catalogue, selections: typing.List[typing.List[str]], engine: str,
+                 seed: int) -> dict:
+    '''Returns timings of solver engine over selections'''
+    solver = movements.get_solver(engine)
+    coverages = [catalogue.coverage(selection) for selection in selections]
+
+    times, n_failed, n_options = [], 0, []
+    for ix, coverage in enumerate(coverages):
+        rng = random.Random(seed + ix)
+        t_init = time.perf_counter()
+        try:
+            warm_options = solver(coverage, max_moves=movements.MAX_MOVES, rng=rng)
+        except RuntimeError:
+            n_failed += 1
+        else:
+            n_options.append(len(warm_options))
+        times.append(time.perf_counter() - t_init)
+
+    return summarise(times, failed=n_failed,
+                     mean_options=round(statistics.mean(n_options), 2) if n_options else 0)
+
+def bench_par_nodes(repeat: int) -> dict:
+    '''Returns timings of walking from each leaf of a search graph with
+    the create_warmups layout back to its root'''
+    graph = nx.DiGraph()
+    graph.add_nodes_from([f"1_Move {ix}" for ix in range(7)])
+    leaves = list(graph.nodes)
+    for level, width in zip(range(2, movements.MAX_MOVES+1), range(6, 0, -1)):
+        next_leaves = []
+        for ix, leaf in enumerate(leaves):
+            children = [f"{level}{ix}_Move {jx}" for jx in range(width)]
+            graph.add_edges_from([(leaf, child) for child in children])
+            next_leaves.extend(children)
+        leaves = next_leaves
+
+    times = []
+    for _ in range(repeat):
+        t_init = time.perf_counter()
+        for leaf in leaves:
+            movements.get_par_nodes(graph, leaf)
+        times.append(time.perf_counter() - t_init)
+
+    return summarise(times, leaves=len(leaves))
+
+def bench_supersets(catalogue: Catalogue, selections: typing.List[typing.List[str]], seed: int) -> dict:
+    '''Returns timings of remove_warmup_supersets on de-duplicated
+    random candidate warm-ups of up to MAX_MOVES movements drawn from
+    each selection's linked warm-ups'''
+    rng = random.Random(seed)
+    candidates = []
+    for selection in selections:
+        warm_names = sorted(set(name for work_name in selection for name in catalogue.workouts[work_name]))
+        warmups = [sorted(rng.sample(warm_names, min(rng.randint(1, movements.MAX_MOVES), len(warm_names))))
+                   for _ in range(500)]
+        warmups.sort()
+        candidates.append([warmup for ix, warmup in enumerate(warmups) if not ix or warmup != warmups[ix-1]])
+
+    times = []
+    for warmups in candidates:
+        warmups = [list(warmup) for warmup in warmups]
+        t_init = time.perf_counter()
+        movements.remove_warmup_supersets(warmups)
+        times.append(time.perf_counter() - t_init)
+
+    return summarise(times, mean_candidates=round(statistics.mean(map(len, candidates)), 2))
+
+def bench_index(catalogue: Catalogue, selections: typing.List[typing.List[str]], seed: int) -> dict:
+    '''Returns timings of POST / through the Flask test client on a
+    temporary SQLite db loaded with catalogue, with and without the
+    warm-up cache, solving in deterministic mode with seed'''
+    temp_dpath = tempfile.mkdtemp()
+
+    class BenchConfig(config.TestConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{temp_dpath}/bench.db"
+        WARMUP_SEED = seed
+
+    try:
+        app = sidekik.create_app(BenchConfig)
+        with app.app_context():
+            db.create_all()
+            load_catalogue(catalogue)
+            test_client = app.test_client()
+
+            def post(selection):
+                data = {f"moves-{ix}-move": name for ix, name in enumerate(selection)}
+                t_init = time.perf_counter()
+                response = test_client.post("/", data=data)
+                elapsed = time.perf_counter() - t_init
+
+                if response.status_code != 200:
+                    raise RuntimeError(f"POST / returned {response.status_code}")
+
+                return elapsed
+
+            test_client.get("/")
+            uncached = []
+            for selection in selections:
+                warmup_cache.clear()
+                uncached.append(post(selection))
+
+            cached = [post(selection) for selection in selections]
+            get_times = []
+            for _ in selections:
+                t_init = time.perf_counter()
+                test_client.get("/")
+                get_times.append(time.perf_counter() - t_init)
+
+            db.session.remove()
+
+    finally:
+        sidekik_catalogue.invalidate()
+        shutil.rmtree(temp_dpath)
+
+    return {"index_get": summarise(get_times), "index_post_uncached": summarise(uncached),
+            "index_post_cached": summarise(cached)}
+
+
+#helper functions
+def get_commit() -> typing.Optional[str]:
+    '''Returns current git commit hash, or None outside a git repo'''
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL,
+                                       text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def summarise(times: typing.List[float], **extra) -> dict:
+    '''Returns summary statistics in seconds for times'''
+    times = sorted(times)
+    summary = {
+        "n": len(times),
+        "min": round(times[0], 6),
+        "median": round(statistics.median(times), 6),
+        "mean": round(statistics.mean(times), 6),
+        "p95": round(times[min(len(times)-1, int(0.95*len(times)))], 6),
+        "max": round(times[-1], 6)
+    }
+    summary.update(extra)
+
+    return summary
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
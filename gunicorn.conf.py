@@ -0,0 +1,12 @@
+'''gunicorn server hooks, read from the working directory by gunicorn'''
+from sidekik import config, metrics
+
+
+def on_starting(server):
+    '''Clears metrics files left by a previous run'''
+    metrics.clear_files(config.Config.METRICS_DIR)
+
+def child_exit(server, worker):
+    '''Removes metrics file of an exited worker, so a new worker reusing
+    its pid doesn't start from its counts'''
+    metrics.remove_file(config.Config.METRICS_DIR, worker.pid)
@@ -5,17 +5,21 @@ import flask_login
 import flask_migrate
 import flask_sqlalchemy
 import logging
+from werkzeug.middleware import proxy_fix
 
-from sidekik import config
+from sidekik import cache, config
 
 
 #extensions
 admin_mgr = flask_admin.Admin(base_template="admin/base.html", template_mode="bootstrap4")
+dashboard_cache = cache.TTLCache()
 db = flask_sqlalchemy.SQLAlchemy()
 login = flask_login.LoginManager()
 login.login_view = "admin.login"
 login.login_message = "Please sign in to see this page."
 migrate = flask_migrate.Migrate()
+principal_cache = cache.TTLCache()
+warmup_cache = cache.TTLCache()
 
 
 def create_app(app_config=config.Config):
@@ -23,24 +27,42 @@ def create_app(app_config=config.Config):
     app = flask.Flask(__name__)
     app.config.from_object(app_config)
 
+    #client addresses from trusted proxies' X-Forwarded-For headers
+    if app.config["PROXY_COUNT"]:
+        app.wsgi_app = proxy_fix.ProxyFix(app.wsgi_app, x_for=app.config["PROXY_COUNT"])
+
     #add extensions
     from sidekik import views
 
     admin_mgr.init_app(app, index_view=views.IndexView())
+    dashboard_cache.init_app(app, "DASHBOARD_CACHE")
     db.init_app(app)
     login.init_app(app)
     migrate.init_app(app, db)
+    principal_cache.init_app(app, "PRINCIPAL_CACHE")
+    warmup_cache.init_app(app, "WARMUP_CACHE")
 
      #load models
-    from sidekik import models
+    from sidekik import auth, metrics, models, telemetry
+
+    auth.hash_pool.init_app(app)
+    auth.throttle.init_app(app)
+    metrics.registry.init_app(app)
+    telemetry.writer.init_app(app)
 
     #register blueprints
-    from sidekik import errors, movements
+    from sidekik import api, errors, movements
 
+    app.register_blueprint(api.bp)
     app.register_blueprint(errors.bp)
+    app.register_blueprint(metrics.bp)
     app.register_blueprint(movements.bp)
     app.add_url_rule("/", endpoint="index")
 
+    #register commands
+    app.cli.add_command(movements.precompute_command)
+    app.cli.add_command(movements.replay_command)
+
     #add admin views
     admin_mgr.add_view(views.AccountView(models.User, db.session, name="Accounts", category="Users"))
     admin_mgr.add_view(views.MoveTypeView(models.MoveType, db.session, name="Movement Types", 
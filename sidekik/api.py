@@ -0,0 +1,130 @@
+'''blueprint for the JSON warm-up API'''
+
+import flask
+from flask import current_app, request
+import time
+import typing
+
+from sidekik import catalogue, movements, spans, telemetry
+
+
+#blueprint
+bp = flask.Blueprint("api", __name__, url_prefix="/api")
+
+
+@bp.route("/warmups", methods=["POST"])
+def create_warmup():
+    '''Returns warm-up for {"workouts": [names]}'''
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return error_response("Expected a JSON object with a list of workout names in 'workouts'")
+
+    snapshot = catalogue.get_snapshot()
+
+    work_names, error = parse_selection(data.get("workouts"), snapshot)
+    if error:
+        return error
+
+    return flask.jsonify(solve_selections(snapshot, [work_names])[0])
+
+@bp.route("/warmups/batch", methods=["POST"])
+def create_warmups_batch():
+    '''Returns warm-ups for {"selections": [[names], ...]} in order,
+    solving identical selections once'''
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return error_response("Expected a JSON object with a list of workout selections in 'selections'")
+
+    selections = data.get("selections")
+    snapshot = catalogue.get_snapshot()
+
+    if not isinstance(selections, list) or not selections:
+        return error_response("Expected a non-empty list of workout selections in 'selections'")
+
+    elif len(selections) > current_app.config["API_BATCH_LIMIT"]:
+        return error_response(f"Batches are limited to {current_app.config['API_BATCH_LIMIT']} selections")
+
+    parsed = []
+    for ix, selection in enumerate(selections):
+        work_names, error = parse_selection(selection, snapshot, index=ix)
+        if error:
+            return error
+        parsed.append(work_names)
+
+    return flask.jsonify({"results": solve_selections(snapshot, parsed)})
+
+@bp.route("/workouts/suggest", methods=["GET"])
+def suggest_workouts():
+    '''Returns {"suggestions": [names]} of labelled workouts matching
+    ?q= for autocomplete'''
+    snapshot = catalogue.get_snapshot()
+    suggestions = snapshot.suggest_workouts(request.args.get("q", ""), current_app.config["SUGGEST_LIMIT"])
+
+    return flask.jsonify(suggestions=suggestions)
+
+
+#helper functions
+def error_response(message: str, status: int = 400, **extra) -> flask.Response:
+    '''Returns JSON error response'''
+    response = flask.jsonify(error=message, **extra)
+    response.status_code = status
+    return response
+
+def parse_selection(selection, snapshot: catalogue.Snapshot,
+                    index: int = None) -> typing.Tuple[typing.List[str], typing.Optional[flask.Response]]:
+    '''Returns de-duplicated workout names in selection matched by
+    name_key, and an error response if selection is invalid or has workouts not
+    found in snapshot'''
+    where = "" if index is None else f" in selection {index}"
+
+    if not isinstance(selection, list) or not all(isinstance(name, str) for name in selection):
+        return [], error_response(f"Expected a list of workout names{where}")
+
+    if not any(name.strip() for name in selection):
+        return [], error_response(f"No movements found in workout selection{where}")
+
+    work_names, unknown = snapshot.resolve_workouts(name for name in selection if name.strip())
+    if unknown:
+        return [], error_response(f"Movements not found in workout library{where}", unknown=unknown)
+
+    return work_names, None
+
+def solve_selections(snapshot: catalogue.Snapshot,
+                     selections: typing.List[typing.List[str]]) -> typing.List[dict]:
+    '''Returns warm-up result for each selection, solving identical
+    selections once and queueing all created warm-ups together'''
+    solved = {}
+    records, results = [], []
+
+    for work_names in selections:
+        key = tuple(sorted(work_names))
+        choice_seed = movements.get_seed(work_names)
+        if key not in solved:
+            with spans.collect(current_app.config["WARMUP_SPANS"]) as recorder:
+                t_init = time.perf_counter()
+                try:
+                    warm_options, seed = movements.find_warmups(snapshot, work_names, 
+                                                                max_moves=movements.MAX_MOVES, 
+                                                                seed=choice_seed)
+                except RuntimeError:
+                    warm_options, seed = [], choice_seed
+                ex_time = round(time.perf_counter() - t_init, 4)
+            solved[key] = (warm_options, ex_time, seed, spans.record_fields(recorder))
+
+        warm_options, ex_time, seed, span_fields = solved[key]
+        if warm_options:
+            warm_moves = movements.choose_warmup(warm_options, choice_seed)
+        else:
+            warm_moves, choice_seed = [], None
+
+        records.append({"work_ids": snapshot.workout_ids(work_names),
+                        "warm_ids": [snapshot.warmup_ids[name] for name in warm_moves],
+                        "ex_time": ex_time if warm_options else None, "passed": bool(warm_options),
+                        "seed": seed, "choice_seed": choice_seed, **span_fields})
+        results.append({"workouts": work_names, "passed": bool(warm_options), "warmup": warm_moves,
+                        "options": warm_options, "ex_time": ex_time, "seed": seed,
+                        "choice_seed": choice_seed})
+
+    telemetry.writer.record(records)
+
+    return results
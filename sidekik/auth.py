@@ -0,0 +1,172 @@
+'''password hashing pool and login throttling for the admin login'''
+
+import collections
+from concurrent import futures
+import threading
+import time
+import typing
+
+from werkzeug import security
+
+
+#hash verified for unknown emails so they take as long as known ones
+DUMMY_PASSWORD = "lorumipsumlorumipsum"
+
+
+class HashPoolBusy(RuntimeError):
+    '''Raised when the password hashing pool has no free slots'''
+    pass
+
+
+class HashPool():
+    '''Bounded thread pool for password hashing and verification.
+
+    At most PASSWORD_HASH_WORKERS hashes run at once per process and at
+    most PASSWORD_HASH_QUEUE more wait, so a burst of logins can't take
+    every worker's CPU. Callers beyond that get HashPoolBusy straight
+    away rather than queueing. Hashes use PASSWORD_HASH_METHOD, and
+    needs_rehash flags hashes made with another method.
+    '''
+
+    def __init__(self):
+        self.method = "pbkdf2:sha256"
+        self.timeout = 10.0
+        self.workers = 2
+        self._dummy_hash = None
+        self._executor = None
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(2)
+
+    def init_app(self, app) -> None:
+        '''Configures pool from app config, shutting down any running
+        threads, and makes the dummy hash once so requests never hash
+        outside the pool'''
+        self.shutdown()
+        self.method = app.config["PASSWORD_HASH_METHOD"]
+        self.timeout = app.config["PASSWORD_HASH_TIMEOUT"]
+        self.workers = app.config["PASSWORD_HASH_WORKERS"]
+        self._dummy_hash = security.generate_password_hash(DUMMY_PASSWORD, method=self.method)
+        self._slots = threading.BoundedSemaphore(self.workers + app.config["PASSWORD_HASH_QUEUE"])
+
+    def check(self, pwhash: typing.Optional[str], password: str) -> bool:
+        '''Returns true if password matches pwhash, checking against the
+        dummy hash if pwhash is None, made in the pool if init_app hasn't
+        made it'''
+        if pwhash is None:
+            if self._dummy_hash is None:
+                self._dummy_hash = self.hash(DUMMY_PASSWORD)
+            self._submit(security.check_password_hash, self._dummy_hash, password)
+            return False
+
+        return self._submit(security.check_password_hash, pwhash, password)
+
+    def hash(self, password: str) -> str:
+        '''Returns hash of password made with method'''
+        return self._submit(security.generate_password_hash, password, method=self.method)
+
+    def needs_rehash(self, pwhash: str) -> bool:
+        '''Returns true if pwhash wasn't made with method'''
+        return get_method(pwhash) != get_method(self.method)
+
+    def shutdown(self) -> None:
+        '''Stops pool threads after running hashes finish'''
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+    def _start(self) -> futures.ThreadPoolExecutor:
+        '''Returns executor, creating its hashing threads on the first
+        hash after init_app or shutdown, as a pool made before gunicorn
+        forks would have no threads in the workers'''
+        with self._lock:
+            if self._executor is None:
+                self._executor = futures.ThreadPoolExecutor(max_workers=self.workers,
+                                                            thread_name_prefix="password-hash")
+            return self._executor
+
+    def _submit(self, func: typing.Callable, *args, **kwargs):
+        if not self._slots.acquire(blocking=False):
+            raise HashPoolBusy("Password hashing pool is full")
+
+        try:
+            future = self._start().submit(func, *args, **kwargs)
+        except Exception:
+            self._slots.release()
+            raise
+
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except futures.TimeoutError:
+            raise HashPoolBusy("Password hashing timed out")
+
+
+class LoginThrottle():
+    '''In-memory token buckets limiting login attempts per client IP and
+    per email.
+
+    Each key holds up to LOGIN_ATTEMPTS tokens, refilled evenly over
+    LOGIN_ATTEMPTS_PERIOD seconds, and an attempt takes a token from
+    both its IP's and its email's bucket. At most LOGIN_THROTTLE_SIZE
+    keys are held, evicting the least recently used.
+    '''
+
+    def __init__(self):
+        self.capacity = 10
+        self.maxsize = 10000
+        self.rate = 10/60
+        self._buckets = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app) -> None:
+        '''Configures buckets from app config, clearing any held'''
+        self.capacity = app.config["LOGIN_ATTEMPTS"]
+        self.maxsize = app.config["LOGIN_THROTTLE_SIZE"]
+        self.rate = self.capacity/app.config["LOGIN_ATTEMPTS_PERIOD"]
+        self.clear()
+
+    def allow(self, ip: typing.Optional[str], email: str) -> bool:
+        '''Takes a token from the buckets of ip and email, returning
+        false without taking either if one is empty'''
+        keys = [("ip", ip), ("email", email.strip().casefold())]
+        now = time.monotonic()
+
+        with self._lock:
+            levels = [self._level(key, now) for key in keys]
+            allowed = all(level >= 1 for level in levels)
+
+            for key, level in zip(keys, levels):
+                self._buckets[key] = (level - 1 if allowed else level, now)
+                self._buckets.move_to_end(key)
+
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+
+        return allowed
+
+    def clear(self) -> None:
+        '''Removes all buckets'''
+        with self._lock:
+            self._buckets.clear()
+
+    def _level(self, key: tuple, now: float) -> float:
+        '''Returns tokens in key's bucket at now'''
+        tokens, updated = self._buckets.get(key, (self.capacity, now))
+        return min(self.capacity, tokens + (now - updated)*self.rate)
+
+
+#helper functions
+def get_method(pwhash: str) -> str:
+    '''Returns hashing method of pwhash, or of method string, with
+    werkzeug's default pbkdf2 iterations filled in'''
+    method = pwhash.split("$", 1)[0]
+    if method.startswith("pbkdf2:") and method.count(":") == 1:
+        method = f"{method}:{security.DEFAULT_PBKDF2_ITERATIONS}"
+
+    return method
+
+
+#extensions
+hash_pool = HashPool()
+throttle = LoginThrottle()
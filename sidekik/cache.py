@@ -0,0 +1,84 @@
+'''in-process caches shared across requests within a worker'''
+
+import collections
+import threading
+import time
+import typing
+
+
+class TTLCache():
+    '''Thread-safe LRU cache with time-to-live expiry and hit/miss
+    counters:
+
+    maxsize int max entries held before least recently used is evicted
+    ttl float seconds an entry is served for, None to never expire
+    '''
+
+    def __init__(self, maxsize: int = 256, ttl: float = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __repr__(self):
+        return f"<TTLCache: {len(self)}/{self.maxsize}>"
+
+    def init_app(self, app, prefix: str) -> None:
+        '''Sets maxsize and ttl from app config keys {prefix}_SIZE and
+        {prefix}_TTL, clearing any cached entries'''
+        self.maxsize = app.config[f"{prefix}_SIZE"]
+        self.ttl = app.config[f"{prefix}_TTL"]
+        self.clear()
+
+    def clear(self) -> None:
+        '''Removes all entries and resets counters'''
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def delete(self, key: typing.Hashable) -> None:
+        '''Removes entry cached under key if present'''
+        with self._lock:
+            self._data.pop(key, None)
+
+    def get(self, key: typing.Hashable, default=None):
+        '''Returns value cached for key, or default if missing or
+        expired'''
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and (self.ttl is None or time.monotonic() < item[0]):
+                self._data.move_to_end(key)
+                self.hits += 1
+                return item[1]
+
+            elif item is not None:
+                del self._data[key]
+
+            self.misses += 1
+            return default
+
+    def set(self, key: typing.Hashable, value) -> None:
+        '''Caches value under key, evicting least recently used entries
+        beyond maxsize'''
+        expires = None if self.ttl is None else time.monotonic() + self.ttl
+
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        '''Returns size, hit, miss and eviction counts and the hit ratio'''
+        lookups = self.hits + self.misses
+        return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits,
+                "misses": self.misses, "evictions": self.evictions,
+                "hit_ratio": round(self.hits/lookups, 4) if lookups else 0}
@@ -0,0 +1,187 @@
+'''in-process snapshot of the workout, warm-up and movement type catalogue'''
+
+import bisect
+import difflib
+from flask import current_app
+import hashlib
+import re
+import threading
+import time
+import types
+import typing
+
+from sidekik import db, models, solvers
+from sidekik.models import MoveType, Warmup, Workout
+
+
+class Snapshot(typing.NamedTuple):
+    '''Immutable view of the catalogue used on the warm-up request path:
+
+    version str digest of the catalogue content
+    built float time.monotonic() when snapshot was built
+    move_types tuple of movement type names, one per bit
+    warmups mapping of warm-up id to (name, movement type mask)
+    warmup_ids mapping of warm-up name to id
+    workouts mapping of workout name to (id, tuple of warm-up ids)
+    workout_keys mapping of workout name_key to sorted tuple of names, more
+        than one if names differ only in case or whitespace
+    labelled_workouts sorted tuple of workout names with a labelled warm-up
+    labelled_keys mapping of name_key to sorted tuple of names of the
+        labelled workouts
+    workout_index sorted tuple of (name_key suffix, name) for each word
+        start in the name_key of each labelled workout
+    '''
+    version: str
+    built: float
+    move_types: typing.Tuple[str, ...]
+    warmups: typing.Mapping[int, typing.Tuple[str, int]]
+    warmup_ids: typing.Mapping[str, int]
+    workouts: typing.Mapping[str, typing.Tuple[int, typing.Tuple[int, ...]]]
+    workout_keys: typing.Mapping[str, typing.Tuple[str, ...]]
+    labelled_workouts: typing.Tuple[str, ...]
+    labelled_keys: typing.Mapping[str, typing.Tuple[str, ...]]
+    workout_index: typing.Tuple[typing.Tuple[str, str], ...]
+
+    def coverage(self, work_names: typing.Iterable[str]) -> solvers.Coverage:
+        '''Returns Coverage of the labelled warm-ups linked to the
+        workouts in work_names, with rows sorted by warm-up name'''
+        warm_ids = set()
+        for name in work_names:
+            if name in self.workouts:
+                warm_ids.update(self.workouts[name][1])
+
+        rows = sorted(self.warmups[warm_id] for warm_id in warm_ids if self.warmups[warm_id][1])
+        used = 0
+        for _, mask in rows:
+            used |= mask
+
+        #compress global type bits to the types covered by rows
+        bits = solvers.mask_to_indices(used)
+        row_masks = tuple(sum(1 << jx for jx, bit in enumerate(bits) if mask >> bit & 1)
+                          for _, mask in rows)
+        col_masks = tuple(sum(1 << ix for ix, mask in enumerate(row_masks) if mask >> jx & 1)
+                          for jx in range(len(bits)))
+
+        return solvers.Coverage(tuple(name for name, _ in rows), tuple(self.move_types[bit] for bit in bits),
+                                row_masks, col_masks)
+
+    def resolve_workouts(self, names: typing.Iterable[str]) -> typing.Tuple[typing.List[str], typing.List[str]]:
+        '''Returns de-duplicated workout names matching names by
+        name_key, and the stripped names not found in snapshot. Where
+        workouts share a name_key, the one named exactly as entered is
+        matched, otherwise all of them'''
+        work_names, unknown = [], []
+        for name in names:
+            matches = self.workout_keys.get(models.movement_key(name))
+            if matches is None:
+                unknown.append(name.strip())
+                continue
+
+            entered = " ".join(name.split())
+            for work_name in ((entered,) if entered in matches else matches):
+                if work_name not in work_names:
+                    work_names.append(work_name)
+
+        return work_names, unknown
+
+    def suggest_workouts(self, query: str, limit: int) -> typing.List[str]:
+        '''Returns up to limit labelled workout names with a word starting
+        with query, names starting with query first, topped up with close
+        matches of the whole name for typos'''
+        key = models.movement_key(query)
+        if not key:
+            return []
+
+        names = set()
+        ix = bisect.bisect_left(self.workout_index, (key,))
+        while ix < len(self.workout_index) and self.workout_index[ix][0].startswith(key):
+            names.add(self.workout_index[ix][1])
+            ix += 1
+
+        suggestions = sorted(names, key=lambda name: (not models.movement_key(name).startswith(key), name))
+        if len(suggestions) >= limit or len(key) <= 2:
+            return suggestions[:limit]
+
+        #close matches scan every labelled name, so only run when prefix matches come up short
+        for close_key in difflib.get_close_matches(key, self.labelled_keys, n=limit, cutoff=0.6):
+            suggestions.extend(name for name in self.labelled_keys[close_key] if name not in names)
+
+        return suggestions[:limit]
+
+    def workout_ids(self, work_names: typing.Iterable[str]) -> typing.List[int]:
+        '''Returns ids of the workouts in work_names found in snapshot'''
+        return [self.workouts[name][0] for name in work_names if name in self.workouts]
+
+
+#module state
+_lock = threading.Lock()
+_snapshot = None
+
+
+def get_snapshot() -> Snapshot:
+    '''Returns current catalogue snapshot, building it if it has been
+    invalidated or is older than CATALOGUE_TTL seconds'''
+    global _snapshot
+
+    snapshot = _snapshot
+    if snapshot is None or time.monotonic() - snapshot.built > current_app.config["CATALOGUE_TTL"]:
+        with _lock:
+            if _snapshot is snapshot:
+                _snapshot = build_snapshot()
+            snapshot = _snapshot
+
+    return snapshot
+
+def invalidate() -> None:
+    '''Drops current catalogue snapshot so the next request rebuilds it'''
+    global _snapshot
+
+    with _lock:
+        _snapshot = None
+
+
+#helper functions
+def build_snapshot() -> Snapshot:
+    '''Returns Snapshot of the catalogue read with one query per table'''
+    move_types = tuple(name for name, in db.session.query(MoveType.name).order_by(MoveType.name))
+    type_bits = {name: 1 << jx for jx, name in enumerate(move_types)}
+
+    warm_masks = {}
+    for warm_id, type_name in db.session.query(models.warm_types.c.warm_id, MoveType.name).join(
+            MoveType, MoveType.id == models.warm_types.c.move_type_id):
+        warm_masks[warm_id] = warm_masks.get(warm_id, 0) | type_bits[type_name]
+
+    warmups = {warm_id: (name, warm_masks.get(warm_id, 0))
+               for warm_id, name in db.session.query(Warmup.id, Warmup.name)}
+
+    links = {}
+    for warm_id, work_id in db.session.query(models.warm_work.c.warm_id, models.warm_work.c.work_id):
+        links.setdefault(work_id, []).append(warm_id)
+
+    #names kept per name_key, as names differing only in case or whitespace may both be stored
+    workouts, workout_keys = {}, {}
+    for work_id, name, name_key in db.session.query(Workout.id, Workout.name, Workout.name_key).order_by(
+            Workout.name):
+        workouts[name] = (work_id, tuple(sorted(links.get(work_id, []))))
+        workout_keys.setdefault(name_key, []).append(name)
+
+    labelled_workouts = tuple(name for name, in db.session.query(Workout.name).filter(
+        Workout.has_labelled_warmups.is_(True)).order_by(Workout.name))
+
+    labelled = set(labelled_workouts)
+    workout_keys = {name_key: tuple(names) for name_key, names in workout_keys.items()}
+    labelled_keys = {}
+    for name_key, names in workout_keys.items():
+        labelled_names = tuple(name for name in names if name in labelled)
+        if labelled_names:
+            labelled_keys[name_key] = labelled_names
+    workout_index = tuple(sorted((name_key[match.start():], name) for name_key, names in labelled_keys.items()
+                                 for name in names for match in re.finditer(r"\b\w", name_key)))
+
+    digest = hashlib.sha1(repr((move_types, sorted(warmups.items()), sorted(workouts.items()))).encode())
+
+    return Snapshot(digest.hexdigest()[:12], time.monotonic(), move_types,
+                    types.MappingProxyType(warmups),
+                    types.MappingProxyType({name: warm_id for warm_id, (name, _) in warmups.items()}),
+                    types.MappingProxyType(workouts), types.MappingProxyType(workout_keys), labelled_workouts,
+                    types.MappingProxyType(labelled_keys), workout_index)
@@ -1,7 +1,8 @@
 '''configs for development and production'''
 import datetime
 import dotenv
-from os import environ
+from os import environ, path
+import tempfile
 
 
 #load environment varaibles
@@ -16,10 +17,69 @@ class Config():
     #cookies
     REMEMBER_COOKIE_DURATION = datetime.timedelta(weeks=1)
 
+    #logged in users' ids, active flags and roles cached across requests (max entries, seconds)
+    PRINCIPAL_CACHE_SIZE = int(environ.get("PRINCIPAL_CACHE_SIZE") or 1024)
+    PRINCIPAL_CACHE_TTL = float(environ.get("PRINCIPAL_CACHE_TTL") or 60)
+
+    #password hashing method, upgraded on next login, and bounded hashing pool (threads, waiting, seconds)
+    PASSWORD_HASH_METHOD = environ.get("PASSWORD_HASH_METHOD") or "pbkdf2:sha256:150000"
+    PASSWORD_HASH_WORKERS = int(environ.get("PASSWORD_HASH_WORKERS") or 2)
+    PASSWORD_HASH_QUEUE = int(environ.get("PASSWORD_HASH_QUEUE") or 8)
+    PASSWORD_HASH_TIMEOUT = float(environ.get("PASSWORD_HASH_TIMEOUT") or 10)
+
+    #login attempts allowed per client IP and per email (attempts, seconds, max keys tracked)
+    LOGIN_ATTEMPTS = int(environ.get("LOGIN_ATTEMPTS") or 10)
+    LOGIN_ATTEMPTS_PERIOD = float(environ.get("LOGIN_ATTEMPTS_PERIOD") or 60)
+    LOGIN_THROTTLE_SIZE = int(environ.get("LOGIN_THROTTLE_SIZE") or 10000)
+
+    #trusted proxies setting X-Forwarded-For in front of the app, 1 for heroku's router, 0 if none
+    PROXY_COUNT = int(environ.get("PROXY_COUNT") or 1)
+
     #db parameters
     SQLALCHEMY_DATABASE_URI = environ.get("DATABASE_URL") or "postgresql+psycopg2:///sidekik"
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    #warm-up generation (bitset, exact or pandas)
+    WARMUP_SOLVER = environ.get("WARMUP_SOLVER") or "bitset"
+
+    #base seed making solves deterministic per workout selection, random seeds if unset
+    WARMUP_SEED = int(environ["WARMUP_SEED"]) if environ.get("WARMUP_SEED") else None
+
+    #seconds per stage and solver nodes expanded stored with created warm-ups (set WARMUP_SPANS_OFF to disable)
+    WARMUP_SPANS = environ.get("WARMUP_SPANS_OFF") is None
+
+    #warm-up options cached per workout selection (max entries, seconds)
+    WARMUP_CACHE_SIZE = int(environ.get("WARMUP_CACHE_SIZE") or 1024)
+    WARMUP_CACHE_TTL = float(environ.get("WARMUP_CACHE_TTL") or 3600)
+
+    #max workout selections per /api/warmups/batch request
+    API_BATCH_LIMIT = int(environ.get("API_BATCH_LIMIT") or 100)
+
+    #created warm-ups written in batches by a background thread (set TELEMETRY_SYNC to disable)
+    TELEMETRY_ASYNC = environ.get("TELEMETRY_SYNC") is None
+    TELEMETRY_QUEUE_SIZE = int(environ.get("TELEMETRY_QUEUE_SIZE") or 10000)
+    TELEMETRY_FLUSH_SIZE = int(environ.get("TELEMETRY_FLUSH_SIZE") or 100)
+    TELEMETRY_FLUSH_INTERVAL = float(environ.get("TELEMETRY_FLUSH_INTERVAL") or 2)
+
+    #max workout names returned by /api/workouts/suggest
+    SUGGEST_LIMIT = int(environ.get("SUGGEST_LIMIT") or 10)
+
+    #largest workout combination stored by flask precompute-warmups, and looked up when creating warm-ups
+    PRECOMPUTE_MAX_SIZE = int(environ.get("PRECOMPUTE_MAX_SIZE") or 2)
+
+    #seconds before a worker rebuilds its catalogue snapshot, catching admin changes in other workers
+    CATALOGUE_TTL = int(environ.get("CATALOGUE_TTL") or 300)
+
+    #admin dashboard metrics window (days) and stats cache (max entries, seconds)
+    DASHBOARD_WINDOW_DAYS = float(environ.get("DASHBOARD_WINDOW_DAYS") or 7)
+    DASHBOARD_CACHE_SIZE = int(environ.get("DASHBOARD_CACHE_SIZE") or 4)
+    DASHBOARD_CACHE_TTL = float(environ.get("DASHBOARD_CACHE_TTL") or 30)
+
+    #/metrics files per worker process, summed when scraped (dir, seconds between writes, bearer token)
+    METRICS_DIR = environ.get("METRICS_DIR") or path.join(tempfile.gettempdir(), "sidekik_metrics")
+    METRICS_FLUSH_INTERVAL = float(environ.get("METRICS_FLUSH_INTERVAL") or 1)
+    METRICS_TOKEN = environ.get("METRICS_TOKEN") or None
+
     #logging
     LOG_TO_STDOUT = environ.get("LOG_TO_STDOUT") or None
 
@@ -36,5 +96,7 @@ class Config():
 class TestConfig(Config):
     '''Unit testing configuration'''
     SQLALCHEMY_DATABASE_URI = "sqlite:///{temp_dpath}/app.db"
+    METRICS_DIR = None
+    TELEMETRY_ASYNC = False
     TESTING = True
     WTF_CSRF_ENABLED = False
@@ -0,0 +1,62 @@
+'''aggregate metrics shown on the admin dashboard'''
+
+from datetime import datetime, timedelta
+from flask import current_app
+import math
+import typing
+
+from sidekik import dashboard_cache, db
+from sidekik.models import CreatedWarmup, Warmup, Workout
+
+
+def get_stats() -> dict:
+    '''Returns dashboard stats over the last DASHBOARD_WINDOW_DAYS days,
+    served from dashboard_cache for up to DASHBOARD_CACHE_TTL seconds'''
+    window_days = current_app.config["DASHBOARD_WINDOW_DAYS"]
+
+    stats = dashboard_cache.get(window_days)
+    if stats is None:
+        stats = compute_stats(window_days)
+        dashboard_cache.set(window_days, stats)
+
+    return stats
+
+def compute_stats(window_days: float) -> dict:
+    '''Returns movement labelling percentages and created warm-up counts,
+    with the pass rate and ex_time percentiles of warm-ups created in
+    the last window_days days, using aggregate queries only'''
+    stats = {"window_days": window_days, "n_warmups": CreatedWarmup.query.count()}
+
+    for name, move_model in [("lab_warm_perc", Warmup), ("lab_work_perc", Workout)]:
+        n_rows, n_labelled = db.session.query(
+            db.func.count(move_model.id), db.func.sum(db.case([(move_model.labelled, 1)], else_=0))
+        ).one()
+        stats[name] = round(100*(n_labelled or 0)/n_rows, 2) if n_rows else 0
+
+    since = datetime.utcnow() - timedelta(days=window_days)
+    n_window, n_passed = db.session.query(
+        db.func.count(CreatedWarmup.id), db.func.sum(db.case([(CreatedWarmup.passed, 1)], else_=0))
+    ).filter(CreatedWarmup.date >= since).one()
+    stats["n_window"] = n_window
+    stats["pass_rate"] = round(100*(n_passed or 0)/n_window, 2) if n_window else None
+
+    timed = CreatedWarmup.query.filter(CreatedWarmup.date >= since, CreatedWarmup.ex_time.isnot(None))
+    n_timed = timed.count()
+    for name, quantile in [("ex_time_p50", 0.5), ("ex_time_p95", 0.95)]:
+        stats[name] = get_quantile(timed, n_timed, quantile)
+
+    return stats
+
+
+#helper functions
+def get_quantile(query, n_rows: int, quantile: float) -> typing.Optional[float]:
+    '''Returns nearest-rank quantile of ex_time over the n_rows rows of
+    query, fetching one row with LIMIT/OFFSET'''
+    if not n_rows:
+        return None
+
+    offset = max(0, math.ceil(quantile*n_rows) - 1)
+    ex_time, = query.with_entities(CreatedWarmup.ex_time).order_by(CreatedWarmup.ex_time).offset(
+        offset).limit(1).one()
+
+    return round(ex_time, 4)
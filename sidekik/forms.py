@@ -2,13 +2,11 @@
 
 import flask_wtf
 import flask_wtf.file as wtfile
-import io
-import pandas as pd
-from werkzeug import utils
 import wtforms
 from wtforms import validators
 
-from sidekik.models import MoveType, Workout
+from sidekik import catalogue, db, models, uploads
+from sidekik.models import MoveType
 
 
 #admin forms
@@ -24,21 +22,17 @@ class UploadMoveCatForm(flask_wtf.FlaskForm):
         wtfile.FileRequired(), wtfile.FileAllowed(["csv"], "The file provided is not a CSV file.")
     ])
     submit = wtforms.SubmitField("Upload File")
-    df = None
+    upload = None
 
     def validate_fmoves(self, fmoves):
-        sec_fname = utils.secure_filename(fmoves.data.filename)
-        stream = io.StringIO(fmoves.data.read().decode("ascii"), newline=None)
-        df = pd.read_csv(stream)
+        upload = read_upload(fmoves)
 
-        if list(df.columns) != ["Movement"] + sorted([row.name for row in MoveType.query.all()]):
+        type_names = [name for name, in db.session.query(MoveType.name).order_by(MoveType.name)]
+        if upload.header != ["Movement"] + type_names:
             raise validators.ValidationError(("The file provided is invalid. The top row must match"
                                                   " the template file"))
 
-        if df["Movement"].duplicated().sum():
-            raise validators.ValidationError("The file provided has duplicate movements in it.")
-
-        self.df = df
+        self.upload = upload
 
 
 class UploadMovesForm(flask_wtf.FlaskForm):
@@ -46,19 +40,20 @@ class UploadMovesForm(flask_wtf.FlaskForm):
         wtfile.FileRequired(), wtfile.FileAllowed(["csv"], "The file provided is not a CSV file.")
     ])
     submit = wtforms.SubmitField("Upload File")
-    df = None
+    upload = None
 
     def validate_fmoves(self, fmoves):
-        sec_fname = utils.secure_filename(fmoves.data.filename)
-        stream = io.StringIO(fmoves.data.read().decode("ascii"), newline=None)
-        df = pd.read_csv(stream)
-
-        for ix, lab in enumerate(df.columns):
-            if lab == f"Unnamed: {ix}":
-                raise validators.ValidationError(("The file provided is invalid. The top row cannot"
-                                                  " have any empty cells."))
+        upload = read_upload(fmoves)
+
+        if not upload.header or any(not lab.strip() for lab in upload.header):
+            raise validators.ValidationError(("The file provided is invalid. The top row cannot"
+                                              " have any empty cells."))
+
+        if len(set(upload.header)) < len(upload.header):
+            raise validators.ValidationError(("The file provided is invalid. The top row cannot"
+                                              " have any duplicate movements."))
         
-        self.df = df
+        self.upload = upload
 
 
 #app forms
@@ -66,14 +61,35 @@ class MoveForm(flask_wtf.FlaskForm):
     '''Form for each movement in MoveListForm'''
     move = wtforms.StringField(validators=[validators.Length(max=50)])
 
-    def validate_move(self, move):
-        move = move.data.title().strip()
-        if move and not Workout.query.filter_by(name=move).first():
-            raise validators.ValidationError("Movement not found in workout library.")
-
 
 class MoveListForm(flask_wtf.FlaskForm):
-    '''Form for users to enter movements into'''
+    '''Form for users to enter movements into. Once validated,
+    work_names holds the de-duplicated workout names entered'''
     moves = wtforms.FieldList(wtforms.FormField(MoveForm), min_entries=5)
     submit = wtforms.SubmitField("Create Warm-up")
+    work_names = None
+
+    def validate_moves(self, moves):
+        snapshot = catalogue.get_snapshot()
+        entries = [entry.move for entry in moves if entry.move.data.strip()]
+
+        #resolve all movements in one lookup, marking each movement not found
+        work_names, unknown = snapshot.resolve_workouts(entry.data for entry in entries)
+        if unknown:
+            for entry in entries:
+                if models.movement_key(entry.data) not in snapshot.workout_keys:
+                    entry.errors.append("Movement not found in workout library.")
+
+            raise validators.ValidationError(f"Movements not found in workout library: {', '.join(unknown)}")
+
+        self.work_names = work_names
+
 
+#helper functions
+def read_upload(fmoves: wtforms.FileField) -> uploads.CSVUpload:
+    '''Returns CSVUpload reading the file in fmoves, raising a
+    ValidationError if its top row can't be read'''
+    try:
+        return uploads.CSVUpload(fmoves.data.stream)
+    except uploads.UploadError as error:
+        raise validators.ValidationError(str(error))
@@ -0,0 +1,261 @@
+'''Prometheus text format metrics for requests, warm-ups, SQL and caches'''
+
+import atexit
+import bisect
+import collections
+import contextlib
+import flask
+from flask import current_app, request
+import glob
+import json
+import os
+import sqlalchemy
+import tempfile
+import threading
+import time
+import typing
+
+from sidekik import dashboard_cache, principal_cache, warmup_cache
+
+
+#metric name: (type, help, histogram bucket upper bounds)
+METRICS = {
+    "sidekik_request_seconds": ("histogram", "Request latency by endpoint",
+                                (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)),
+    "sidekik_warmup_solve_seconds": ("histogram", "Seconds spent solving warm-ups not cached or precomputed",
+                                     (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)),
+    "sidekik_warmup_nodes_expanded": ("histogram", "Search nodes expanded per warm-up solve",
+                                      (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)),
+    "sidekik_warmups_created_total": ("counter", "Created warm-ups recorded, by passed", None),
+    "sidekik_db_statement_seconds": ("histogram", "SQL statement execution time",
+                                     (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1)),
+    "sidekik_cache_hits_total": ("counter", "In-process cache hits since the cache was last cleared", None),
+    "sidekik_cache_misses_total": ("counter", "In-process cache misses since the cache was last cleared", None)
+}
+
+#in-process caches reported by name
+CACHES = {"dashboard": dashboard_cache, "principal": principal_cache, "warmup": warmup_cache}
+
+
+#blueprint
+bp = flask.Blueprint("metrics", __name__)
+
+
+@bp.route("/metrics", methods=["GET"])
+def get_metrics():
+    '''Returns metrics of all worker processes in Prometheus text
+    format'''
+    token = current_app.config["METRICS_TOKEN"]
+    if token and request.headers.get("Authorization") != f"Bearer {token}":
+        flask.abort(404)
+
+    return flask.Response(registry.render(), mimetype="text/plain; version=0.0.4")
+
+
+class MetricsRegistry():
+    '''Counters and histograms held in-process and written to a file per
+    process in METRICS_DIR, at most every METRICS_FLUSH_INTERVAL seconds,
+    so render() can sum them across gunicorn workers. Without METRICS_DIR
+    only the serving process's metrics are rendered.
+
+    A process's file is removed when it exits, and gunicorn.conf.py
+    clears the directory when the master starts and removes the files of
+    workers that die, so pids reused by new workers start from zero.
+    '''
+
+    def __init__(self):
+        self.directory = None
+        self.flush_interval = 1.0
+        self._flushed = 0
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._counters = collections.defaultdict(float)
+        self._histograms = {}
+        atexit.register(self.remove_file)
+
+    def init_app(self, app) -> None:
+        '''Configures registry from app config and times requests'''
+        self.directory = app.config["METRICS_DIR"]
+        self.flush_interval = app.config["METRICS_FLUSH_INTERVAL"]
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+
+        app.before_request(start_request)
+        app.after_request(end_request)
+
+    def clear(self) -> None:
+        '''Removes all metrics of this process'''
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def inc(self, name: str, labels: dict = None, value: float = 1) -> None:
+        '''Adds value to counter name'''
+        key = (name, make_labels(labels))
+        with self._lock:
+            self._check_pid()
+            self._counters[key] += value
+
+    def observe(self, name: str, value: float, labels: dict = None) -> None:
+        '''Adds value to histogram name'''
+        key = (name, make_labels(labels))
+        buckets = METRICS[name][2]
+        with self._lock:
+            self._check_pid()
+            counts = self._histograms.setdefault(key, [0]*(len(buckets) + 1) + [0.0])
+            counts[bisect.bisect_left(buckets, value)] += 1
+            counts[-1] += value
+
+    def flush(self, force: bool = False) -> None:
+        '''Writes this process's metrics to its file in directory, if
+        flush_interval has passed since the last write or force'''
+        now = time.monotonic()
+        if not self.directory or (not force and now - self._flushed < self.flush_interval):
+            return
+
+        self._flushed = now
+        data = self.snapshot()
+        fd, temp_fpath = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as fout:
+            json.dump(data, fout)
+        os.replace(temp_fpath, get_fpath(self.directory, self._pid))
+
+    def remove_file(self) -> None:
+        '''Removes this process's file from directory, if any'''
+        if self.directory:
+            remove_file(self.directory, os.getpid())
+
+    def render(self) -> str:
+        '''Returns metrics summed over every process's file, or of this
+        process without directory, in Prometheus text format'''
+        if self.directory:
+            self.flush(force=True)
+            snapshots = []
+            for fpath in glob.glob(os.path.join(self.directory, "metrics_*.json")):
+                try:
+                    with open(fpath) as fin:
+                        snapshots.append(json.load(fin))
+                except (OSError, ValueError):
+                    continue
+        else:
+            snapshots = [self.snapshot()]
+
+        counters, histograms = collections.defaultdict(float), {}
+        for data in snapshots:
+            for name, labels, value in data["counters"]:
+                counters[(name, tuple(map(tuple, labels)))] += value
+            for name, labels, counts in data["histograms"]:
+                total = histograms.setdefault((name, tuple(map(tuple, labels))), [0]*len(counts))
+                for ix, count in enumerate(counts):
+                    total[ix] += count
+
+        lines = []
+        for name, (metric_type, help_text, buckets) in METRICS.items():
+            lines.extend([f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"])
+            if metric_type == "counter":
+                lines.extend(f"{name}{format_labels(labels)} {value}"
+                             for (key, labels), value in sorted(counters.items()) if key == name)
+            else:
+                for (key, labels), counts in sorted(histograms.items()):
+                    if key == name:
+                        lines.extend(format_histogram(name, labels, buckets, counts))
+
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict:
+        '''Returns JSON serialisable counters and histograms of this
+        process, with the current cache counts'''
+        with self._lock:
+            self._check_pid()
+            counters = [[name, labels, value] for (name, labels), value in self._counters.items()]
+            histograms = [[name, labels, counts] for (name, labels), counts in self._histograms.items()]
+
+        for cache_name, cache in CACHES.items():
+            stats = cache.stats()
+            labels = make_labels({"cache": cache_name})
+            counters.append(["sidekik_cache_hits_total", labels, stats["hits"]])
+            counters.append(["sidekik_cache_misses_total", labels, stats["misses"]])
+
+        return {"counters": counters, "histograms": histograms}
+
+    def _check_pid(self) -> None:
+        '''Drops metrics inherited from a parent process, so forked
+        workers only count their own'''
+        if os.getpid() != self._pid:
+            self._pid = os.getpid()
+            self._counters.clear()
+            self._histograms.clear()
+
+
+#request hooks
+def start_request() -> None:
+    flask.g.metrics_start = time.perf_counter()
+
+def end_request(response: flask.Response) -> flask.Response:
+    start = flask.g.pop("metrics_start", None)
+    if start is not None:
+        registry.observe("sidekik_request_seconds", time.perf_counter() - start,
+                         {"endpoint": request.endpoint or "none"})
+        registry.flush()
+
+    return response
+
+
+#engine hooks
+@sqlalchemy.event.listens_for(sqlalchemy.engine.Engine, "before_cursor_execute")
+def start_statement(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metrics_start", []).append(time.perf_counter())
+
+@sqlalchemy.event.listens_for(sqlalchemy.engine.Engine, "after_cursor_execute")
+def end_statement(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("metrics_start")
+    if starts:
+        registry.observe("sidekik_db_statement_seconds", time.perf_counter() - starts.pop())
+
+
+#helper functions
+def clear_files(directory: typing.Optional[str]) -> None:
+    '''Removes metrics files of every process from directory'''
+    if directory:
+        for fpath in glob.glob(os.path.join(directory, "metrics_*.json")):
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(fpath)
+
+def format_histogram(name: str, labels: tuple, buckets: tuple, counts: list) -> typing.List[str]:
+    '''Returns cumulative bucket, sum and count lines of a histogram'''
+    lines, cumulative = [], 0
+    for bound, count in zip(buckets + ("+Inf",), counts):
+        cumulative += count
+        lines.append(f"{name}_bucket{format_labels(labels + (('le', str(bound)),))} {cumulative}")
+
+    lines.append(f"{name}_sum{format_labels(labels)} {counts[-1]}")
+    lines.append(f"{name}_count{format_labels(labels)} {cumulative}")
+
+    return lines
+
+def format_labels(labels: tuple) -> str:
+    '''Returns labels as {name="value",...}, or blank if none'''
+    if not labels:
+        return ""
+
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+               for _, value in labels)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + "}"
+
+def get_fpath(directory: str, pid: int) -> str:
+    '''Returns path of the metrics file of process pid in directory'''
+    return os.path.join(directory, f"metrics_{pid}.json")
+
+def make_labels(labels: typing.Optional[dict]) -> tuple:
+    '''Returns labels as a sorted tuple of (name, value) pairs'''
+    return tuple(sorted((name, str(value)) for name, value in (labels or {}).items()))
+
+def remove_file(directory: typing.Optional[str], pid: int) -> None:
+    '''Removes metrics file of process pid from directory, if any'''
+    if directory:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(get_fpath(directory, pid))
+
+
+#extension
+registry = MetricsRegistry()
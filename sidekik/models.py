@@ -1,15 +1,20 @@
 '''postgres tables and their relationships'''
 from datetime import datetime
 import flask_login
+import functools
 import inflect
+import itertools
 import pandas as pd
 import pkg_resources
 from os import environ
 import time
 import typing
-from werkzeug import security
 
-from sidekik import db, login
+from sidekik import auth, db, login, principal_cache
+
+
+#max distinct raw movement names held by normalize_movement
+NORMALIZE_CACHE_SIZE = 4096
 
 
 #tables
@@ -48,19 +53,28 @@ work_types = db.Table("work_types",
 class CreatedWarmup(db.Model):
     '''Class for tracking warm-ups created
 
+    choice_seed int, seed the warm-up was chosen from its options with
     date datetime not_null
     ex_time_s float not_null
+    nodes_expanded int, search nodes expanded by the solver, null if not solved
+    seed int, seed the warm-up options were solved with
+    spans relationship, seconds per stage of creating the warm-up
     workouts relationship
     warmups relationship
     '''
 
     id = db.Column(db.Integer(), primary_key=True)
+    choice_seed = db.Column(db.Integer)
     date = db.Column(db.DateTime, index=True, default=datetime.utcnow, nullable=False)
     ex_time = db.Column(db.Float)
+    nodes_expanded = db.Column(db.Integer)
     passed = db.Column(db.Boolean)
-    warmups = db.relationship("Warmup", secondary=create_warm, lazy="subquery", 
+    seed = db.Column(db.Integer)
+    spans = db.relationship("WarmupSpan", lazy=True, order_by="WarmupSpan.id",
+                            backref=db.backref("created_warmup", lazy=True))
+    warmups = db.relationship("Warmup", secondary=create_warm, lazy=True, 
                               backref=db.backref("created_warmups", lazy=True), order_by="Warmup.name")
-    workouts = db.relationship("Workout", secondary=create_work, lazy="subquery", 
+    workouts = db.relationship("Workout", secondary=create_work, lazy=True, 
                                backref=db.backref("created_warmups", lazy=True), order_by="Workout.name")
 
     def __repr__(self):
@@ -94,6 +108,65 @@ class MoveType(db.Model):
         return self.name
 
 
+class PrecomputedWarmup(db.Model):
+    '''Class for warm-up options precomputed for a workout selection:
+
+    selection str(255) unique not_null, sorted workout ids joined by ","
+    version str(12) not_null, catalogue snapshot version options match
+    engine str(10) not_null, solver engine options were solved with
+    options text not_null, JSON list of warm-ups
+    seed int, seed the options were solved with
+    date datetime not_null
+    '''
+
+    id = db.Column(db.Integer(), primary_key=True)
+    selection = db.Column(db.String(255), index=True, unique=True, nullable=False)
+    version = db.Column(db.String(12), nullable=False)
+    engine = db.Column(db.String(10), nullable=False)
+    options = db.Column(db.Text(), nullable=False)
+    seed = db.Column(db.Integer)
+    date = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<Precomputed Warm-up: {self.selection}>"
+
+    @staticmethod
+    def make_selection(work_ids: typing.Iterable[int]) -> str:
+        '''Returns selection key for workout ids'''
+        return ",".join(map(str, sorted(set(work_ids))))
+
+
+class Principal(flask_login.UserMixin):
+    '''Class for the logged in user's identity, cached across requests
+    so access checks don't load User rows:
+
+    id int
+    active bool
+    roles frozenset of role names
+    '''
+
+    def __init__(self, id: int, active: bool, roles: typing.FrozenSet[str]):
+        self.id = id
+        self.active = active
+        self.roles = roles
+
+    @property
+    def is_active(self):
+        return self.active
+
+    def __repr__(self):
+        return f"<Principal: {self.id}>"
+
+    @classmethod
+    def from_user(cls, user: "User") -> "Principal":
+        return cls(user.id, user.active, user.role_names())
+
+    def has_role(self, roles: list) -> bool:
+        '''Returns true if principal has role name in roles, else returns 
+        false'''
+        return not self.roles.isdisjoint(roles)
+
+
 class Role(db.Model):
     '''Class for user roles:
     
@@ -126,7 +199,7 @@ class User(db.Model, flask_login.UserMixin):
     active = db.Column(db.Boolean(), default=True, nullable=False)
     email = db.Column(db.String(255), unique=True, nullable=False)
     password = db.Column(db.String(255), nullable=False)
-    roles = db.relationship("Role", secondary=roles_users, lazy="subquery", 
+    roles = db.relationship("Role", secondary=roles_users, lazy=True, 
                             backref=db.backref("users", lazy=True), order_by="Role.name")
 
     @property
@@ -140,59 +213,96 @@ class User(db.Model, flask_login.UserMixin):
         return self.email
 
     def check_password(self, password):
-        return security.check_password_hash(self.password, password)
+        return auth.hash_pool.check(self.password, password)
 
     def has_role(self, roles: list) -> bool:
         '''Returns true if user has role name in roles, else returns 
         false'''
-        role_in = False
-        for name in roles:
-            if name in [row.name for row in self.roles]:
-                role_in = True
-                break
+        return not self.role_names().isdisjoint(roles)
 
-        return role_in
+    def role_names(self) -> typing.FrozenSet[str]:
+        '''Returns names of user's roles'''
+        return frozenset(row.name for row in self.roles)
+
+    def needs_rehash(self) -> bool:
+        '''Returns true if password wasn't hashed with the configured
+        PASSWORD_HASH_METHOD'''
+        return auth.hash_pool.needs_rehash(self.password)
 
     def set_password(self, password):
-        self.password = security.generate_password_hash(password)
+        self.password = auth.hash_pool.hash(password)
 
 
 class Warmup(db.Model):
     '''Class for warm-up movements, described by their attributes:
     
+    labelled bool not_null, has movement types, kept by refresh_labels
     name str(50) not_null
+    name_key str(50) not_null, case and whitespace insensitive name
     workouts relationship
     '''
 
     id = db.Column(db.Integer, primary_key=True)
+    labelled = db.Column(db.Boolean(), index=True, nullable=False, default=False)
     name = db.Column(db.String(50), index=True, nullable=False, unique=True)
-    move_types = db.relationship("MoveType", secondary=warm_types, lazy="subquery", 
+    name_key = db.Column(db.String(50), index=True, nullable=False, default=lambda ctx: name_key_default(ctx))
+    move_types = db.relationship("MoveType", secondary=warm_types, lazy=True, 
                                  backref=db.backref("warmups", lazy=True), order_by="MoveType.name")
 
-
     def __repr__(self):
         return f"<Warm-up Movement: {self.name}>"
 
     def __str__(self):
         return self.name
 
+    @db.validates("name")
+    def validate_name(self, key, name):
+        self.name_key = movement_key(name)
+        return name
+
     @property
     def is_labelled(self):
-        return len(self.move_types) > 0
+        return self.labelled
+
+
+class WarmupSpan(db.Model):
+    '''Class for time spent in a stage of creating a warm-up:
+
+    create_id int not_null
+    name str(50) not_null
+    seconds float not_null
+    '''
+
+    id = db.Column(db.Integer(), primary_key=True)
+    create_id = db.Column(db.Integer(), db.ForeignKey("created_warmup.id"), index=True, nullable=False)
+    name = db.Column(db.String(50), nullable=False)
+    seconds = db.Column(db.Float, nullable=False)
+
+    def __repr__(self):
+        return f"<Warm-up Span: {self.name}>"
+
+    def __str__(self):
+        return f"{self.name}: {self.seconds}"
 
 
 class Workout(db.Model):
     '''Class for workout movements, described by their attributes:
 
+    has_labelled_warmups bool not_null, linked to a labelled warm-up, kept by refresh_labels
+    labelled bool not_null, has movement types, kept by refresh_labels
     name str(50) not_null
+    name_key str(50) not_null, case and whitespace insensitive name
     warmups relationship
     '''
 
     id = db.Column(db.Integer, primary_key=True)
-    move_types = db.relationship("MoveType", secondary=work_types, lazy="subquery", 
+    has_labelled_warmups = db.Column(db.Boolean(), index=True, nullable=False, default=False)
+    labelled = db.Column(db.Boolean(), index=True, nullable=False, default=False)
+    move_types = db.relationship("MoveType", secondary=work_types, lazy=True, 
                                  backref=db.backref("workouts", lazy=True), order_by="MoveType.name")
     name = db.Column(db.String(50), index=True, nullable=False, unique=True)
-    warmups = db.relationship("Warmup", secondary=warm_work, lazy="subquery", 
+    name_key = db.Column(db.String(50), index=True, nullable=False, default=lambda ctx: name_key_default(ctx))
+    warmups = db.relationship("Warmup", secondary=warm_work, lazy=True, 
                               backref=db.backref("workouts", lazy=True), order_by="Warmup.name")
 
     def __repr__(self):
@@ -201,20 +311,109 @@ class Workout(db.Model):
     def __str__(self):
         return self.name
 
+    @db.validates("name")
+    def validate_name(self, key, name):
+        self.name_key = movement_key(name)
+        return name
+
     @property
     def is_labelled(self):
-        return len(self.move_types) > 0
+        return self.labelled
 
     @property
     def warmups_labelled(self):
-        return any(item.is_labelled for item in self.warmups)
-
+        return self.has_labelled_warmups
+
+
+#shared inflect engine for normalize_movement
+_inf_eng = inflect.engine()
+
+
+#query loading profiles, relationships are lazy unless a profile is applied at the call site
+db.configure_mappers()
+
+LOAD_PROFILES = {
+    #admin list views, showing model columns and user roles only, links stay lazy so bulk deletes clear them
+    "admin_list": {
+        User: (db.selectinload(User.roles),),
+        Warmup: (db.lazyload(Warmup.move_types), db.lazyload(Warmup.workouts)),
+        Workout: (db.lazyload(Workout.move_types), db.lazyload(Workout.warmups))
+    },
+    #current user and their roles, loaded on every request
+    "auth": {
+        User: (db.selectinload(User.roles),)
+    },
+    #single movements edited with their links in the admin
+    "catalogue": {
+        Warmup: (db.selectinload(Warmup.move_types), db.selectinload(Warmup.workouts)),
+        Workout: (db.selectinload(Workout.move_types), db.selectinload(Workout.warmups))
+    },
+    #created warm-ups listed with their workout and warm-up counts
+    "telemetry": {
+        CreatedWarmup: (db.selectinload(CreatedWarmup.warmups), db.selectinload(CreatedWarmup.workouts))
+    },
+    #single created warm-ups shown with their stage timings
+    "telemetry_details": {
+        CreatedWarmup: (db.selectinload(CreatedWarmup.spans), db.selectinload(CreatedWarmup.warmups),
+                        db.selectinload(CreatedWarmup.workouts))
+    }
+}
 
 
 #login handler
 @login.user_loader
 def load_user(id):
-    return User.query.get(int(id))
+    principal = principal_cache.get(int(id))
+    if principal is None:
+        user = User.query.options(*load_options(User, "auth")).get(int(id))
+        if user is None:
+            return None
+
+        principal = Principal.from_user(user)
+        principal_cache.set(principal.id, principal)
+
+    return principal
+
+
+#session hooks maintaining label flags and cached principals
+@db.event.listens_for(db.session, "after_flush")
+def track_flushed_changes(session, flush_context):
+    '''Marks session for refresh_labels when movements or movement
+    types, or the links between them, were flushed, and records users
+    whose cached principal is stale, or all if a role was flushed'''
+    stale = session.info.setdefault("stale_principals", set())
+    for row in itertools.chain(session.new, session.dirty, session.deleted):
+        if isinstance(row, (MoveType, Warmup, Workout)):
+            session.info["refresh_labels"] = True
+        elif isinstance(row, User) and row.id is not None:
+            stale.add(row.id)
+        elif isinstance(row, Role):
+            stale.add(None)
+
+@db.event.listens_for(db.session, "before_commit")
+def refresh_flagged_labels(session):
+    '''Runs refresh_labels in the committing transaction if flushed
+    changes may have changed the label flags'''
+    session.flush()
+    if session.info.pop("refresh_labels", False):
+        refresh_labels(session)
+
+@db.event.listens_for(db.session, "after_commit")
+def drop_stale_principals(session):
+    '''Removes principals of users changed in the committed transaction
+    from principal_cache, clearing it if a role changed'''
+    stale = session.info.pop("stale_principals", set())
+    if None in stale:
+        principal_cache.clear()
+    else:
+        for user_id in stale:
+            principal_cache.delete(user_id)
+
+@db.event.listens_for(db.session, "after_rollback")
+def drop_tracked_changes(session):
+    '''Forgets changes tracked for a transaction rolled back'''
+    session.info.pop("refresh_labels", None)
+    session.info.pop("stale_principals", None)
 
 
 #helper functions
@@ -260,6 +459,32 @@ def create_movement_types() -> None:
     db.session.commit()
     stream.close()
 
+def load_options(model, profile: str) -> tuple:
+    '''Returns loader options of LOAD_PROFILES profile for queries of
+    model, none if the profile doesn't cover model'''
+    return LOAD_PROFILES[profile].get(model, ())
+
+def movement_key(move: str) -> str:
+    '''Returns case and whitespace insensitive key of a parsed movement
+    name, used to look up movements without re-parsing them'''
+    return " ".join(move.split()).casefold()
+
+def name_key_default(context) -> str:
+    '''Returns movement_key of the name inserted, so bulk inserts of
+    warm-ups and workouts fill name_key'''
+    return movement_key(context.get_current_parameters()["name"])
+
+@functools.lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def normalize_movement(move: str) -> str:
+    '''Returns parse_movement of move, memoized across requests'''
+    return parse_movement(move, _inf_eng)
+
+def normalize_movements(moves: pd.Series) -> pd.Series:
+    '''Returns moves with each distinct value normalized once and
+    missing values kept'''
+    parsed = {move: normalize_movement(str(move)) for move in moves.dropna().unique()}
+    return moves.map(parsed)
+
 def parse_movement(move: str, inf_eng) -> str:
     '''Returns parsed movement as singular noun in title format'''
     
@@ -278,4 +503,59 @@ def parse_movement(move: str, inf_eng) -> str:
             move = sing_word if sing_word else move
     
     return move
-    
\ No newline at end of file
+
+def refresh_labels(session=None) -> int:
+    '''Sets the labelled flag of warm-ups and workouts and the
+    has_labelled_warmups flag of workouts from the link tables with
+    set-based updates, in the current transaction of session. Only rows
+    whose flag changes are written, so unchanged movements aren't
+    locked. Returns number of rows updated'''
+    session = session or db.session
+    warm_linked = db.exists().where(warm_types.c.warm_id == Warmup.id)
+    work_linked = db.exists().where(work_types.c.work_id == Workout.id)
+    work_warm_linked = db.exists().where(db.and_(warm_work.c.work_id == Workout.id, 
+                                                 warm_work.c.warm_id == Warmup.id, Warmup.labelled))
+
+    updates = [
+        Warmup.__table__.update().where(Warmup.labelled != warm_linked).values(labelled=warm_linked),
+        Workout.__table__.update().where(Workout.labelled != work_linked).values(labelled=work_linked),
+        Workout.__table__.update().where(Workout.has_labelled_warmups != work_warm_linked).values(
+            has_labelled_warmups=work_warm_linked)
+    ]
+
+    return sum(session.execute(update).rowcount for update in updates)
+
+def record_created_warmups(records: typing.List[dict]) -> None:
+    '''Inserts created warm-ups in one transaction, where each record
+    has keys work_ids, warm_ids, ex_time, passed and optionally date,
+    seed, choice_seed, nodes_expanded and spans, mapping stage name to
+    seconds, with the links and spans of all records inserted in bulk'''
+    created_warmups = []
+    for record in records:
+        created_warmup = CreatedWarmup(ex_time=record.get("ex_time"), passed=record.get("passed", True),
+                                       nodes_expanded=record.get("nodes_expanded"), 
+                                       seed=record.get("seed"), choice_seed=record.get("choice_seed"))
+        if record.get("date"):
+            created_warmup.date = record["date"]
+        created_warmups.append(created_warmup)
+
+    db.session.add_all(created_warmups)
+    db.session.flush()
+
+    work_links, warm_links, span_rows = [], [], []
+    for created_warmup, record in zip(created_warmups, records):
+        work_links.extend({"create_id": created_warmup.id, "work_id": work_id} 
+                          for work_id in record.get("work_ids", ()))
+        warm_links.extend({"create_id": created_warmup.id, "warm_id": warm_id} 
+                          for warm_id in record.get("warm_ids", ()))
+        span_rows.extend({"create_id": created_warmup.id, "name": name, "seconds": seconds}
+                         for name, seconds in record.get("spans", {}).items())
+
+    if work_links:
+        db.session.execute(create_work.insert(), work_links)
+    if warm_links:
+        db.session.execute(create_warm.insert(), warm_links)
+    if span_rows:
+        db.session.execute(WarmupSpan.__table__.insert(), span_rows)
+
+    db.session.commit()
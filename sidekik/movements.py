@@ -1,7 +1,10 @@
 '''blueprint for all pages focussed on movements'''
 
+import click
+from datetime import datetime
 import flask
 from flask import current_app
+from flask import cli
 import itertools
 import json
 import networkx as nx
@@ -9,15 +12,20 @@ import pandas as pd
 import random
 import time
 import typing
+import zlib
 
-from sidekik import db, forms, models
-from sidekik.models import Warmup, Workout
+from sidekik import catalogue, db, forms, metrics, models, solvers, spans, telemetry, warmup_cache
+from sidekik.models import CreatedWarmup, PrecomputedWarmup
 
 
 #typing
 created_warmups = typing.Tuple[typing.List[str], typing.List[typing.List[str]]]
 
 
+#max movements in a suggested warm-up
+MAX_MOVES = 5
+
+
 #blueprint
 bp = flask.Blueprint("movements", __name__)
 
@@ -26,52 +34,90 @@ bp = flask.Blueprint("movements", __name__)
 def index():
     form = forms.MoveListForm()
 
-    work_query = Workout.query.all()
-    work_moves = sorted([row.name for row in work_query if row.warmups_labelled])
+    with spans.collect(current_app.config["WARMUP_SPANS"]) as recorder:
+        with spans.span("snapshot"):
+            snapshot = catalogue.get_snapshot()
 
-    warm_moves = []
-    if form.validate_on_submit():
-        sel_moves = [move["move"].title() for move in form.moves.data if move["move"]]
-        if not sel_moves:
-            flask.flash("No movements found in workout form")
-            return flask.redirect(flask.url_for("index", _anchor="create_warmup"))
+        with spans.span("validate"):
+            submitted = form.validate_on_submit()
 
-        work_rows = Workout.query.filter(Workout.name.in_(sel_moves)).all()
-        warm_rows = set([item for sublist in [row.warmups for row in work_rows] for item in sublist])
-        df = pd.DataFrame(map(convert_to_dict, warm_rows)).set_index("name")
-        df = df.dropna(axis=0, how="all").dropna(axis=1, how="all")
+        if submitted:
+            sel_moves = form.work_names
+            if not sel_moves:
+                flask.flash("No movements found in workout form")
+                return flask.redirect(flask.url_for("index", _anchor="create_warmup"))
+
+            work_ids = snapshot.workout_ids(sel_moves)
+            seed = choice_seed = get_seed(sel_moves)
+
+            try:
+                t_init = time.perf_counter()
+                warm_options, seed = find_warmups(snapshot, sel_moves, max_moves=MAX_MOVES, seed=seed)
+                t_end = round(time.perf_counter() - t_init, 4)
+
+            except RuntimeError:
+                flask.flash(("sidekik was not able to create a warm-up for this workout. It has been "
+                             "logged, and a developer will fix this as soon as possible."))
+                with spans.span("render"):
+                    page = flask.render_template("movements/index.html", form=form, scroll="create_warmup")
+
+                telemetry.writer.record([{"work_ids": work_ids, "passed": False, "seed": seed,
+                                          **spans.record_fields(recorder)}])
+                return page
+            
+            else:
+                warm_moves = choose_warmup(warm_options, choice_seed)
+                warm_ids = [snapshot.warmup_ids[name] for name in warm_moves]
+                with spans.span("render"):
+                    page = flask.render_template("movements/index.html", form=form, scroll="create_warmup", 
+                                                 warm_moves=warm_moves, warm_options=json.dumps(warm_options))
+
+                telemetry.writer.record([{"work_ids": work_ids, "warm_ids": warm_ids, "ex_time": t_end, 
+                                          "passed": True, "seed": seed, "choice_seed": choice_seed, 
+                                          **spans.record_fields(recorder)}])
+                return page
+
+    return flask.render_template("movements/index.html", form=form)
+
+
+@click.command("precompute-warmups")
+@click.option("--max-size", type=int, default=None, 
+              help="Largest workout combination to precompute (default PRECOMPUTE_MAX_SIZE).")
+@cli.with_appcontext
+def precompute_command(max_size):
+    '''Precomputes warm-up options for all labelled workout combinations'''
+    if max_size is None:
+        max_size = current_app.config["PRECOMPUTE_MAX_SIZE"]
+    t_init = time.time()
+    n_stored = precompute_warmups(max_size)
+    click.echo(f"Stored warm-up options for {n_stored} workout combinations in "
+               f"{round(time.time() - t_init, 2)}s")
 
-        try:
-            t_init = time.time()
-            warm_options = create_warmups(df, max_moves=5)
-            t_end = round(time.time() - t_init, 4)
-
-        except RuntimeError:
-            flask.flash(("sidekik was not able to create a warm-up for this workout. It has been "
-                         "logged, and a developer will fix this as soon as possible."))
-            failed_warmup = models.CreatedWarmup(workouts=work_rows, passed=False)
-            db.session.add(failed_warmup)
-            db.session.commit()
-
-            return flask.render_template("movements/index.html", form=form, scroll="create_warmup", 
-                                         work_moves=json.dumps(work_moves))
-        
-        else:
-            warm_moves = random.choice(warm_options)
-            warm_rows = Warmup.query.filter(Warmup.name.in_(warm_moves)).all()
-            created_warmup = models.CreatedWarmup(warmups=warm_rows, workouts=work_rows, 
-                                                  ex_time=t_end, passed=True)
-            db.session.add(created_warmup)
-            db.session.commit()
-
-            return flask.render_template("movements/index.html", form=form, scroll="create_warmup", 
-                                         warm_moves=warm_moves, warm_options=json.dumps(warm_options),
-                                         work_moves=json.dumps(work_moves))
-
-    return flask.render_template("movements/index.html", form=form, work_moves=json.dumps(work_moves))
+
+@click.command("replay-warmup")
+@click.argument("create_id", type=int)
+@cli.with_appcontext
+def replay_command(create_id):
+    '''Re-solves created warm-up CREATE_ID with its recorded seeds'''
+    created_warmup = CreatedWarmup.query.get(create_id)
+    if created_warmup is None or created_warmup.seed is None:
+        raise click.ClickException(f"No created warm-up {create_id} with a recorded seed")
+
+    result = replay_warmup(created_warmup)
+    click.echo(f"Workouts: {', '.join(result['workouts'])}")
+    click.echo(f"Warm-up: {', '.join(result['warmup']) or 'none found'} "
+               f"({'matches' if result['matches'] else 'differs from'} the recorded warm-up)")
+    click.echo(f"Solved {len(result['options'])} options in {result['ex_time']}s "
+               f"(recorded {created_warmup.ex_time}s)")
 
 
 #helper function
+def choose_warmup(warm_options: typing.List[typing.List[str]], seed: int) -> typing.List[str]:
+    '''Returns warm-up suggested from warm_options, drawn with its own
+    random.Random(seed) so a recorded choice seed replays whether the
+    options were solved, cached or precomputed'''
+    return random.Random(seed).choice(warm_options)
+
 def convert_to_dict(row: models.Warmup) -> dict:
     '''returns row in workout/warmup table as dict with variables name
     and move_types'''
@@ -81,76 +127,220 @@ def convert_to_dict(row: models.Warmup) -> dict:
 
     return row_dict
 
-def create_warmups(df: pd.DataFrame, max_moves: int, max_out: int = 7) -> created_warmups:
+def create_warmups(df: pd.DataFrame, max_moves: int, max_out: int = 7, 
+                   rng: typing.Optional[random.Random] = None) -> created_warmups:
     '''Returns initial suggestion for warmup and all viable warmups
     found in df with n movements in [min_moves, max_moves].
     
-    max_out sets the limit for out edges from each node.
+    max_out sets the limit for out edges from each node. Each node in 
+    the search frontier carries its chosen movements and the movement 
+    types they cover, and nodes searched are counted as nodes_expanded
+    in the current span recorder. Rows are sampled with rng, the random
+    module if None.
     '''
+    rng = rng or random
+    move_types = {move: frozenset(df.columns[(row > 0).values]) for move, row in df.iterrows()}
+
     mtype_sum = df.sum().sort_values()
     cols = mtype_sum[mtype_sum == mtype_sum.min()].index
     rows = df.index[df[cols].any(axis=1)]
-    rows = random.sample(list(rows), max_out) if rows.shape[0] > max_out else rows
+    rows = rng.sample(list(rows), max_out) if rows.shape[0] > max_out else rows
     
-    graph = nx.DiGraph()
-    graph.add_nodes_from(["1_"+move for move in rows])
-
-    counter = 0
-    loop = 2
-    updating = True 
+    frontier = [((move,), move_types[move]) for move in rows]
     warmups = []
+    n_nodes = 0
     
-    while updating and loop <= max_moves+1:
-        updating = False
+    for loop in range(2, max_moves+2):
         max_out -= 1
+        next_frontier = []
                 
-        for i, leaf in enumerate(list(graph.nodes)[counter:]):
-            rows = [node.split("_")[1] for node in get_par_nodes(graph, leaf)]
-            cols = df.iloc[0, (df.loc[rows].sum() > 0).values].index
-            sub_df = df.drop(index=rows, columns=cols).dropna(axis=0, how="all")
+        for path, covered in frontier:
+            n_nodes += 1
+            sub_df = df.drop(index=list(path), columns=list(covered)).dropna(axis=0, how="all")
 
             if sub_df.shape == (0, 0):
-                warmups.append(sorted(rows))
+                warmups.append(sorted(path))
 
             elif loop != max_moves+1:
                 mtype_sum = sub_df.sum().sort_values()
                 cols = mtype_sum[mtype_sum == mtype_sum.min()].index
                 rows = sub_df.index[sub_df[cols].any(axis=1)]
-                rows = random.sample(list(rows), max_out) if rows.shape[0] > max_out else rows
+                rows = rng.sample(list(rows), max_out) if rows.shape[0] > max_out else rows
                 
-                graph.add_edges_from([(leaf, f"{loop}{i}_"+move) for move in rows])
-                updating = True
+                next_frontier.extend((path + (move,), covered | move_types[move]) for move in rows)
+
+        if not next_frontier:
+            break
 
-            counter += 1
-        loop += 1
+        frontier = next_frontier
             
+    spans.count("nodes_expanded", n_nodes)
     if not warmups:
         raise RuntimeError(f"No warm-ups found with less than {max_moves} movements")
                 
     #remove duplicates and supersets
-    warmups.sort()
-    warmups = list(warmup for warmup, _ in itertools.groupby(warmups))
-    warmups = remove_warmup_supersets(warmups)
+    with spans.span("supersets"):
+        warmups.sort()
+        warmups = list(warmup for warmup, _ in itertools.groupby(warmups))
+        warmups = remove_warmup_supersets(warmups)
     
     return warmups
 
+def find_warmups(snapshot: catalogue.Snapshot, work_names: typing.List[str], max_moves: int,
+                 max_out: int = 7, seed: int = None) -> typing.Tuple[typing.List[typing.List[str]], int]:
+    '''Returns all viable warm-ups for work_names using the configured
+    solver engine, and the seed they were solved with.
+
+    Solves sample with random.Random(seed), seed defaulting to
+    get_seed(work_names). Results are cached by selection, snapshot
+    version and solver parameters with the seed that produced them, so
+    callers must not mutate the returned list. Cache misses of up to
+    PRECOMPUTE_MAX_SIZE workouts read options stored by
+    precompute_warmups for the solver engine before solving.
+    '''
+    solver_name = current_app.config["WARMUP_SOLVER"]
+    key = (tuple(sorted(set(work_names))), snapshot.version, solver_name, max_moves, max_out)
+
+    with spans.span("cache"):
+        cached = warmup_cache.get(key)
+    if cached is not None:
+        return cached
+
+    warm_options, solved_seed = None, None
+    if max_moves == MAX_MOVES and len(key[0]) <= current_app.config["PRECOMPUTE_MAX_SIZE"]:
+        with spans.span("precomputed"):
+            precomputed = PrecomputedWarmup.query.filter_by(
+                selection=PrecomputedWarmup.make_selection(snapshot.workout_ids(work_names)), 
+                version=snapshot.version, engine=solver_name
+            ).first()
+            if precomputed:
+                warm_options, solved_seed = json.loads(precomputed.options), precomputed.seed
+
+    if warm_options is None:
+        solved_seed = get_seed(work_names) if seed is None else seed
+        solver = get_solver(solver_name)
+        with spans.span("coverage"):
+            coverage = snapshot.coverage(work_names)
+        #solves always collect spans, for the solver metrics
+        try:
+            with spans.collect() as solve_recorder, spans.span("solve"):
+                warm_options = solver(coverage, max_moves=max_moves, max_out=max_out, 
+                                      rng=random.Random(solved_seed))
+        finally:
+            spans.merge(solve_recorder)
+            metrics.registry.observe("sidekik_warmup_solve_seconds", solve_recorder.spans["solve"])
+            metrics.registry.observe("sidekik_warmup_nodes_expanded", 
+                                     solve_recorder.counters.get("nodes_expanded", 0))
+
+    #set on misses only, so entries expire WARMUP_CACHE_TTL after they were solved
+    warmup_cache.set(key, (warm_options, solved_seed))
+
+    return warm_options, solved_seed
+
 def get_par_nodes(graph: nx.DiGraph, node: str) -> typing.List[str]:
     '''Returns all parent nodes leading to initial movement'''
+    nodes = [node]
     preds = list(graph.predecessors(node))
-    return [node] + get_par_nodes(graph, preds[0]) if preds else [node]
+    while preds:
+        nodes.append(preds[0])
+        preds = list(graph.predecessors(preds[0]))
+
+    return nodes
     
+def get_seed(work_names: typing.Iterable[str]) -> int:
+    '''Returns seed for solving and choosing a warm-up for work_names.
+    In deterministic mode, when WARMUP_SEED is set, the seed is derived
+    from it and the selection so identical selections search identical
+    trees and choose alike, otherwise it's random per request'''
+    base_seed = current_app.config["WARMUP_SEED"]
+    if base_seed is None:
+        return random.getrandbits(31)
+
+    selection = "\n".join(sorted(set(work_names)))
+    return zlib.crc32(f"{base_seed}\n{selection}".encode()) & 0x7FFFFFFF
+
+def get_solver(name: str) -> typing.Callable[..., typing.List[typing.List[str]]]:
+    '''Returns search function of solver engine name, taking a
+    solvers.Coverage with the (max_moves, max_out) arguments of
+    create_warmups'''
+    engines = {"bitset": solvers.search_bitset, "exact": solvers.search_exact,
+               "pandas": search_pandas}
+    if name not in engines:
+        raise ValueError(f"Unknown warm-up solver '{name}', expected one of {sorted(engines)}")
+
+    return engines[name]
+
+def precompute_warmups(max_size: int) -> int:
+    '''Replaces stored warm-up options with options for every
+    combination of up to max_size labelled workouts, solved with the
+    configured solver engine. Returns number of combinations stored'''
+    snapshot = catalogue.get_snapshot()
+    solver_name = current_app.config["WARMUP_SOLVER"]
+    solver = get_solver(solver_name)
+
+    rows = []
+    for size in range(1, max_size+1):
+        for work_names in itertools.combinations(snapshot.labelled_workouts, size):
+            seed = get_seed(work_names)
+            try:
+                warm_options = solver(snapshot.coverage(work_names), max_moves=MAX_MOVES, 
+                                      rng=random.Random(seed))
+            except RuntimeError:
+                continue
+
+            rows.append({"selection": PrecomputedWarmup.make_selection(snapshot.workout_ids(work_names)),
+                         "version": snapshot.version, "engine": solver_name, 
+                         "options": json.dumps(warm_options), "seed": seed, "date": datetime.utcnow()})
+
+    PrecomputedWarmup.query.delete()
+    for ix in range(0, len(rows), 1000):
+        db.session.execute(PrecomputedWarmup.__table__.insert(), rows[ix:ix+1000])
+    db.session.commit()
+
+    return len(rows)
+
 def remove_warmup_supersets(warmups: typing.List[typing.List[str]]) -> typing.List[typing.List[str]]:
-    '''Returns all sublists which are not a subset of any other 
-    sublist in warmups'''
-    counts = set(map(len, warmups))
-    count_dict = {n: [warmup for warmup in warmups if len(warmup) == n] for n in counts}
-
-    for i, j in [(i, j) for i in counts for j in counts if i > j]:
-        for lg_warmup in count_dict[i]:
-            if lg_warmup in warmups:
-                for sm_warmup in count_dict[j]:
-                    if set(lg_warmup).issuperset(sm_warmup):
-                        warmups.remove(lg_warmup)
-                        break
-                        
-    return warmups
\ No newline at end of file
+    '''Returns all sublists which are not a superset of a shorter
+    sublist in warmups, removing the supersets from warmups in place'''
+    bits = {}
+    masks = []
+    for warmup in warmups:
+        mask = 0
+        for move in warmup:
+            mask |= 1 << bits.setdefault(move, len(bits))
+        masks.append(mask)
+
+    flags = solvers.find_minimal_masks(masks, sizes=list(map(len, warmups)))
+    warmups[:] = [warmup for warmup, keep in zip(warmups, flags) if keep]
+
+    return warmups
+
+def replay_warmup(created_warmup: CreatedWarmup) -> dict:
+    '''Returns workouts, options, warm-up and solve time of re-solving
+    created_warmup with its seed and choosing with its choice seed on the
+    current catalogue snapshot, bypassing the warm-up cache, and whether
+    the warm-up matches the one recorded. Warm-ups recorded without a
+    choice seed were chosen with their seed'''
+    snapshot = catalogue.get_snapshot()
+    solver = get_solver(current_app.config["WARMUP_SOLVER"])
+    work_names = [row.name for row in created_warmup.workouts]
+
+    t_init = time.perf_counter()
+    try:
+        warm_options = solver(snapshot.coverage(work_names), max_moves=MAX_MOVES, 
+                              rng=random.Random(created_warmup.seed))
+    except RuntimeError:
+        warm_options = []
+    ex_time = round(time.perf_counter() - t_init, 4)
+
+    choice_seed = created_warmup.seed if created_warmup.choice_seed is None else created_warmup.choice_seed
+    warm_moves = choose_warmup(warm_options, choice_seed) if warm_options else []
+
+    return {"workouts": work_names, "options": warm_options, "warmup": warm_moves, "ex_time": ex_time,
+            "matches": warm_moves == sorted(row.name for row in created_warmup.warmups)}
+
+def search_pandas(coverage: solvers.Coverage, max_moves: int, max_out: int = 7, 
+                  rng: typing.Optional[random.Random] = None) -> typing.List[typing.List[str]]:
+    '''Returns create_warmups for coverage, used to run the pandas
+    engine on a catalogue snapshot'''
+    return create_warmups(coverage.to_frame(), max_moves, max_out, rng=rng)
@@ -0,0 +1,316 @@
+'''warm-up solver engines working on bitmask encoded movement types'''
+
+import itertools
+import pandas as pd
+import random
+import typing
+
+from sidekik import spans
+
+#typing
+warmup_list = typing.List[typing.List[str]]
+
+
+#masks with more bits set are checked against every smaller mask
+SUBMASK_LIMIT = 12
+
+
+class Coverage(typing.NamedTuple):
+    '''Compact encoding of warm-up movements and the movement types they
+    cover:
+
+    names tuple of warm-up names, one per row
+    types tuple of movement type names, one per bit
+    row_masks tuple of int, bit j set if row covers types[j]
+    col_masks tuple of int, bit i set if types[j] covered by row i
+    '''
+    names: typing.Tuple[str, ...]
+    types: typing.Tuple[str, ...]
+    row_masks: typing.Tuple[int, ...]
+    col_masks: typing.Tuple[int, ...]
+
+    @property
+    def full_mask(self) -> int:
+        '''Returns mask with a bit set for every movement type'''
+        return (1 << len(self.types)) - 1
+
+    def to_frame(self) -> pd.DataFrame:
+        '''Returns coverage in the DataFrame layout used by
+        movements.create_warmups'''
+        df = pd.DataFrame(
+            [[1 if mask >> j & 1 else None for j in range(len(self.types))] for mask in self.row_masks],
+            index=pd.Index(self.names, name="name"), columns=list(self.types), dtype=float
+        )
+        return df.dropna(axis=0, how="all").dropna(axis=1, how="all")
+
+
+#encoding
+def encode_coverage(df: pd.DataFrame) -> Coverage:
+    '''Returns Coverage for df, indexed by warm-up name with a column
+    per movement type where covered types are > 0'''
+    flags = (df.fillna(0) > 0).values
+    row_masks = tuple(sum(1 << j for j, flag in enumerate(row) if flag) for row in flags)
+    col_masks = tuple(sum(1 << i for i, flag in enumerate(col) if flag) for col in flags.T)
+
+    return Coverage(tuple(df.index), tuple(df.columns), row_masks, col_masks)
+
+def encode_rows(rows: typing.Dict[str, typing.Iterable[str]]) -> Coverage:
+    '''Returns Coverage for rows, mapping warm-up name to the movement
+    type names it covers. Rows covering no movement types are dropped'''
+    rows = {name: set(types) for name, types in rows.items() if types}
+    types = tuple(sorted(set().union(*rows.values())))
+    bit = {name: j for j, name in enumerate(types)}
+
+    names = tuple(rows)
+    row_masks = tuple(sum(1 << bit[name] for name in rows[row]) for row in names)
+    col_masks = tuple(sum(1 << i for i, mask in enumerate(row_masks) if mask >> j & 1)
+                      for j in range(len(types)))
+
+    return Coverage(names, types, row_masks, col_masks)
+
+
+#engines
+def create_warmups(df: pd.DataFrame, max_moves: int, max_out: int = 7, 
+                   rng: typing.Optional[random.Random] = None) -> warmup_list:
+    '''Returns all viable warm-ups found in df with at most max_moves
+    movements, using the bitset engine.
+
+    Drop-in replacement for movements.create_warmups.
+    '''
+    return search_bitset(encode_coverage(df), max_moves, max_out, rng=rng)
+
+def create_warmups_exact(df: pd.DataFrame, max_moves: int, max_out: int = 7) -> warmup_list:
+    '''Returns all warm-ups found in df with the fewest movements, up
+    to max_moves, using the exact engine.
+
+    Drop-in replacement for movements.create_warmups, max_out is
+    ignored as the search is not width-capped.
+    '''
+    return search_exact(encode_coverage(df), max_moves)
+
+def search_bitset(coverage: Coverage, max_moves: int, max_out: int = 7, 
+                  rng: typing.Optional[random.Random] = None) -> warmup_list:
+    '''Returns all viable warm-ups in coverage with at most max_moves
+    movements.
+
+    Follows the same width-capped breadth search as
+    movements.create_warmups: each node branches on the rows covering
+    the least covered remaining movement types, sampling at most max_out
+    rows, with max_out reduced by one per level. Rows are sampled with
+    rng, the random module if None, so a seeded rng replays the search.
+    Nodes branched on are counted as nodes_expanded in the current span
+    recorder.
+    '''
+    rng = rng or random
+    full = coverage.full_mask
+    if not full:
+        raise RuntimeError(f"No warm-ups found with less than {max_moves} movements")
+
+    col_bits = [(1 << j, col_mask) for j, col_mask in enumerate(coverage.col_masks)]
+    frontier = [((), 0, 0)]
+    covers = []
+    n_nodes = 0
+
+    for level in range(max_moves + 1):
+        width = max(max_out - level, 0)
+        next_frontier = []
+
+        for path, used, covered in frontier:
+            remaining = full & ~covered
+            if not remaining:
+                covers.append(used)
+                continue
+
+            elif level == max_moves:
+                continue
+
+            n_nodes += 1
+
+            #rows covering the least covered remaining types
+            cand = 0
+            for type_bit, col_mask in col_bits:
+                if remaining & type_bit:
+                    cand |= col_mask
+            cand &= ~used
+
+            min_count, rows_mask = None, 0
+            for type_bit, col_mask in col_bits:
+                if remaining & type_bit:
+                    count = bin(col_mask & cand).count("1")
+                    if min_count is None or count < min_count:
+                        min_count, rows_mask = count, col_mask & cand
+                    elif count == min_count:
+                        rows_mask |= col_mask & cand
+
+            rows = mask_to_indices(rows_mask)
+            rows = rng.sample(rows, width) if len(rows) > width else rows
+
+            next_frontier.extend(
+                (path + (ix,), used | 1 << ix, covered | coverage.row_masks[ix]) for ix in rows
+            )
+
+        if not next_frontier:
+            break
+
+        frontier = next_frontier
+
+    spans.count("nodes_expanded", n_nodes)
+    if not covers:
+        raise RuntimeError(f"No warm-ups found with less than {max_moves} movements")
+
+    return decode_covers(coverage, covers)
+
+def search_exact(coverage: Coverage, max_moves: int, max_out: int = 7, 
+                 rng: typing.Optional[random.Random] = None) -> warmup_list:
+    '''Returns every minimum cover of the movement types in coverage,
+    the warm-ups with the fewest movements, if it has at most max_moves
+    movements.
+
+    Branch-and-bound depth-first search: each node branches on the
+    remaining type with the fewest available rows, and rows branched on
+    earlier are excluded from later siblings so every cover is visited
+    once. Nodes are pruned when a type can no longer be covered, when
+    the lower bound on rows still needed exceeds the smallest cover
+    found so far, or when a chosen row no longer covers a type on its
+    own. Nodes branched on are counted as nodes_expanded in the current
+    span recorder. max_out and rng are ignored as the search doesn't
+    sample.
+    '''
+    full = coverage.full_mask
+    if not full:
+        raise RuntimeError(f"No warm-ups found with less than {max_moves} movements")
+
+    row_masks = coverage.row_masks
+    col_bits = [(1 << j, col_mask) for j, col_mask in enumerate(coverage.col_masks)]
+    stack = [((), 0, 0, 0)]
+    bound = max_moves
+    covers = []
+    n_nodes = 0
+
+    while stack:
+        path, used, covered, excluded = stack.pop()
+        remaining = full & ~covered
+        if not remaining:
+            if len(path) < bound:
+                bound, covers = len(path), []
+            covers.append(used)
+            continue
+
+        elif len(path) >= bound:
+            continue
+
+        #branch on the remaining type with fewest available rows
+        available = ~(used | excluded)
+        cand, min_count, branch_rows = 0, None, 0
+        for type_bit, col_mask in col_bits:
+            if remaining & type_bit:
+                rows_mask = col_mask & available
+                count = bin(rows_mask).count("1")
+                if min_count is None or count < min_count:
+                    min_count, branch_rows = count, rows_mask
+                cand |= rows_mask
+
+        if not min_count:
+            continue
+
+        #lower bound on rows needed to cover the remaining types
+        n_remaining = bin(remaining).count("1")
+        max_gain = max(bin(row_masks[ix] & remaining).count("1") for ix in mask_to_indices(cand))
+        if len(path) + -(-n_remaining // max_gain) > bound:
+            continue
+
+        n_nodes += 1
+        for ix in mask_to_indices(branch_rows):
+            child_path = path + (ix,)
+            if is_irredundant([row_masks[jx] for jx in child_path]):
+                stack.append((child_path, used | 1 << ix, covered | row_masks[ix], excluded))
+
+            excluded |= 1 << ix
+
+    spans.count("nodes_expanded", n_nodes)
+    if not covers:
+        raise RuntimeError(f"No warm-ups found with less than {max_moves} movements")
+
+    return decode_covers(coverage, covers)
+
+
+#helper functions
+def decode_covers(coverage: Coverage, covers: typing.Iterable[int]) -> warmup_list:
+    '''Returns sorted, de-duplicated warm-ups for covers, given as masks
+    of row indices, with supersets of other covers removed'''
+    with spans.span("supersets"):
+        minimal = remove_mask_supersets(list(set(covers)))
+        warmups = [sorted(coverage.names[ix] for ix in mask_to_indices(mask)) for mask in minimal]
+        warmups.sort()
+
+    return warmups
+
+def is_irredundant(masks: typing.List[int]) -> bool:
+    '''Returns True if every mask in masks has a bit set which no
+    other mask in masks has set'''
+    for ix, mask in enumerate(masks):
+        others = 0
+        for jx, other in enumerate(masks):
+            if jx != ix:
+                others |= other
+
+        if not mask & ~others:
+            return False
+
+    return True
+
+def mask_to_indices(mask: int) -> typing.List[int]:
+    '''Returns indices of set bits in mask in ascending order'''
+    indices = []
+    while mask:
+        low = mask & -mask
+        indices.append(low.bit_length() - 1)
+        mask ^= low
+
+    return indices
+
+def find_minimal_masks(masks: typing.List[int], sizes: typing.List[int] = None) -> typing.List[bool]:
+    '''Returns flags marking the masks which have no submask in masks
+    of a smaller size, where sizes defaults to the number of set bits.
+
+    Masks are visited in order of size against an index of the minimal
+    masks already found. Masks with at most SUBMASK_LIMIT bits set look
+    up each of their submasks in a hash set, so the filter is linear in
+    len(masks) for the few-movement warm-ups searched, and larger masks
+    fall back to scanning the index.
+    '''
+    sizes = sizes if sizes is not None else [bin(mask).count("1") for mask in masks]
+    order = sorted(range(len(masks)), key=sizes.__getitem__)
+    flags = [False]*len(masks)
+    kept, kept_list = set(), []
+
+    for _, group in itertools.groupby(order, key=sizes.__getitem__):
+        group = list(group)
+        for ix in group:
+            flags[ix] = not has_submask(masks[ix], kept, kept_list)
+
+        for ix in group:
+            if flags[ix] and masks[ix] not in kept:
+                kept.add(masks[ix])
+                kept_list.append(masks[ix])
+
+    return flags
+
+def has_submask(mask: int, kept: typing.Set[int], kept_list: typing.List[int]) -> bool:
+    '''Returns True if any mask in kept, also listed in kept_list, is a
+    submask of mask'''
+    if bin(mask).count("1") > SUBMASK_LIMIT:
+        return any(sm_mask & mask == sm_mask for sm_mask in kept_list)
+
+    sub = mask
+    while True:
+        if sub in kept:
+            return True
+        elif not sub:
+            return False
+        sub = (sub - 1) & mask
+
+def remove_mask_supersets(masks: typing.List[int]) -> typing.List[int]:
+    '''Returns all masks which are not a superset of another mask in
+    masks'''
+    return [mask for mask, keep in zip(masks, find_minimal_masks(masks)) if keep]
@@ -0,0 +1,87 @@
+'''per-request timing spans and counters for the warm-up pipeline'''
+
+import contextlib
+import contextvars
+import time
+import typing
+
+
+#recorder of the warm-up being created in the current context, None when not collecting
+_recorder = contextvars.ContextVar("span_recorder", default=None)
+
+#returned by span when not collecting, so disabled spans cost a lookup
+_NULL_SPAN = contextlib.nullcontext()
+
+
+class SpanRecorder():
+    '''Records seconds spent in each named stage of creating a warm-up,
+    summed over repeats, and named counters such as solver nodes
+    expanded'''
+
+    def __init__(self):
+        self.counters = {}
+        self.spans = {}
+
+    @contextlib.contextmanager
+    def span(self, name: str):
+        t_init = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spans[name] = self.spans.get(name, 0) + time.perf_counter() - t_init
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def rounded(self, digits: int = 6) -> typing.Dict[str, float]:
+        '''Returns spans in seconds rounded to digits'''
+        return {name: round(seconds, digits) for name, seconds in self.spans.items()}
+
+
+@contextlib.contextmanager
+def collect(enabled: bool = True) -> typing.Iterator[typing.Optional[SpanRecorder]]:
+    '''Yields a SpanRecorder collecting the spans and counts recorded in
+    the block, or None if not enabled'''
+    if not enabled:
+        yield None
+        return
+
+    recorder = SpanRecorder()
+    token = _recorder.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _recorder.reset(token)
+
+def count(name: str, n: int = 1) -> None:
+    '''Adds n to counter name of the current recorder, if collecting'''
+    recorder = _recorder.get()
+    if recorder is not None:
+        recorder.count(name, n)
+
+def merge(recorder: SpanRecorder) -> None:
+    '''Adds spans and counters of recorder to the current recorder, if
+    collecting'''
+    current = _recorder.get()
+    if current is not None:
+        for name, seconds in recorder.spans.items():
+            current.spans[name] = current.spans.get(name, 0) + seconds
+        for name, n in recorder.counters.items():
+            current.count(name, n)
+
+def record_fields(recorder: typing.Optional[SpanRecorder]) -> dict:
+    '''Returns spans and nodes_expanded keys of a created warm-up record
+    for recorder, or no keys if recorder is None'''
+    if recorder is None:
+        return {}
+
+    return {"spans": recorder.rounded(), "nodes_expanded": recorder.counters.get("nodes_expanded")}
+
+def span(name: str) -> typing.ContextManager:
+    '''Returns context manager timing its block as span name of the
+    current recorder, or a no-op if not collecting'''
+    recorder = _recorder.get()
+    if recorder is None:
+        return _NULL_SPAN
+
+    return recorder.span(name)
@@ -0,0 +1,140 @@
+'''background writer for created warm-up records'''
+
+import atexit
+from datetime import datetime
+import queue
+import threading
+import time
+import typing
+
+from sidekik import db, metrics, models
+
+
+class TelemetryWriter():
+    '''Queues created warm-up records in-process and inserts them in
+    batches on a background thread, so requests don't wait on the
+    write transaction.
+
+    Records are dicts accepted by models.record_created_warmups. When
+    TELEMETRY_ASYNC is off records are written on the calling thread,
+    and when the queue is full they are written on the calling thread
+    rather than dropped.
+    '''
+
+    def __init__(self):
+        self.app = None
+        self.enabled = False
+        self.flush_interval = 2.0
+        self.flush_size = 100
+        self._queue = queue.Queue()
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._atexit_registered = False
+
+    def init_app(self, app) -> None:
+        '''Configures writer from app config'''
+        self.app = app
+        self.enabled = app.config["TELEMETRY_ASYNC"]
+        self.flush_interval = app.config["TELEMETRY_FLUSH_INTERVAL"]
+        self.flush_size = app.config["TELEMETRY_FLUSH_SIZE"]
+        self._queue = queue.Queue(maxsize=app.config["TELEMETRY_QUEUE_SIZE"])
+
+    def record(self, records: typing.List[dict]) -> None:
+        '''Queues records for the background thread, or writes them now
+        if the writer is disabled or the queue is full'''
+        for record in records:
+            metrics.registry.inc("sidekik_warmups_created_total", 
+                                 {"passed": "true" if record.get("passed", True) else "false"})
+
+        if not self.enabled:
+            models.record_created_warmups(records)
+            return
+
+        self._start()
+
+        overflow = []
+        for record in records:
+            record.setdefault("date", datetime.utcnow())
+            try:
+                self._queue.put_nowait(record)
+            except queue.Full:
+                overflow.append(record)
+
+        if overflow:
+            self.app.logger.warning(f"Telemetry queue full, writing {len(overflow)} records synchronously")
+            models.record_created_warmups(overflow)
+
+    def flush(self) -> None:
+        '''Writes all queued records on the calling thread'''
+        batch = self._drain(block=False)
+        while batch:
+            self._write(batch)
+            batch = self._drain(block=False)
+
+    def shutdown(self) -> None:
+        '''Stops the background thread and writes remaining records'''
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=max(self.flush_interval, 1)*5)
+            self._thread = None
+
+        self.flush()
+        self._stop.clear()
+
+    #background thread
+    def _start(self) -> None:
+        '''Starts background thread if not running, started lazily so
+        each forked worker runs its own, and registers shutdown once to
+        write queued records when the process exits'''
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name="telemetry-writer", daemon=True)
+                    self._thread.start()
+
+                if not self._atexit_registered:
+                    atexit.register(self.shutdown)
+                    self._atexit_registered = True
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            batch = self._drain(block=True)
+            if batch:
+                self._write(batch)
+                with self.app.app_context():
+                    db.session.remove()
+
+    def _drain(self, block: bool) -> typing.List[dict]:
+        '''Returns up to flush_size queued records. If block, waits up to
+        flush_interval for the first record, then keeps collecting until
+        flush_size records or flush_interval after the first'''
+        batch = []
+        try:
+            if block:
+                batch.append(self._queue.get(timeout=self.flush_interval))
+                deadline = time.monotonic() + self.flush_interval
+                while len(batch) < self.flush_size and not self._stop.is_set():
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    batch.append(self._queue.get(timeout=remaining))
+
+            while len(batch) < self.flush_size:
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+
+        return batch
+
+    def _write(self, batch: typing.List[dict]) -> None:
+        with self.app.app_context():
+            try:
+                models.record_created_warmups(batch)
+            except Exception:
+                self.app.logger.exception(f"Failed to write {len(batch)} created warm-up records")
+                db.session.rollback()
+
+
+#extension
+writer = TelemetryWriter()
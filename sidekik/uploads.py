@@ -0,0 +1,273 @@
+'''set-based pipelines for the admin upload views'''
+
+import contextlib
+import csv
+import io
+import pandas as pd
+import time
+import typing
+
+from sidekik import db, models
+from sidekik.models import MoveType, Warmup, Workout
+
+
+#max values bound in a single IN clause, below SQLite's variable limit
+IN_CHUNK_SIZE = 500
+
+#rows fetched from the cursor per chunk of a streamed export
+EXPORT_CHUNK_SIZE = 1000
+
+#rows per DataFrame read from an uploaded CSV file
+UPLOAD_BATCH_SIZE = 1000
+
+#movement type link table and movement id column for each movement model
+TYPE_LINKS = {Warmup: (models.warm_types, "warm_id"), Workout: (models.work_types, "work_id")}
+
+
+class PhaseTimer():
+    '''Records seconds spent in each named phase of a pipeline'''
+
+    def __init__(self):
+        self.timings = {}
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        t_init = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = round(self.timings.get(name, 0) + time.perf_counter() - t_init, 4)
+
+    def iterate(self, name: str, iterable: typing.Iterable) -> typing.Iterator:
+        '''Yields items of iterable, recording time spent producing them
+        under phase name'''
+        iterator = iter(iterable)
+        while True:
+            with self.phase(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+
+class UploadError(ValueError):
+    '''Raised when an uploaded file can't be read or has invalid
+    content'''
+    pass
+
+
+class CSVUpload():
+    '''Incremental reader of an uploaded CSV file. The header row is
+    read and decoded as UTF-8 on creation so it can be validated before
+    any data rows are read, and batches() yields the remaining rows as
+    DataFrames of at most batch_size rows:
+
+    stream binary file object, such as FileStorage.stream
+    batch_size int max rows per DataFrame
+    '''
+
+    def __init__(self, stream: typing.BinaryIO, batch_size: int = UPLOAD_BATCH_SIZE):
+        self.batch_size = batch_size
+        self.text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+
+        try:
+            self.header = next(csv.reader(self.text), [])
+        except (UnicodeDecodeError, csv.Error) as error:
+            raise UploadError(read_error(error))
+
+    def batches(self) -> typing.Iterator[pd.DataFrame]:
+        '''Yields data rows as DataFrames with header as columns, yielding
+        one empty DataFrame if the file has no data rows'''
+        try:
+            reader = pd.read_csv(self.text, header=None, names=self.header, chunksize=self.batch_size)
+            empty = True
+            for batch in reader:
+                empty = False
+                yield batch
+
+            if empty:
+                yield pd.DataFrame(columns=self.header)
+
+        except (UnicodeDecodeError, ValueError) as error:
+            raise UploadError(read_error(error))
+
+
+def generate_unlabelled_csv(chunk_size: int = EXPORT_CHUNK_SIZE) -> typing.Iterator[str]:
+    '''Yields CSV text of the category upload template, with a row for
+    each distinct warm-up or workout name not labelled with movement
+    types, read from a server-side cursor in chunks of chunk_size'''
+    type_names = [name for name, in db.session.query(MoveType.name).order_by(MoveType.name)]
+
+    unlabelled = [db.session.query(move_model.name.label("name")).filter(move_model.labelled.is_(False))
+                  for move_model in TYPE_LINKS]
+    query = unlabelled[0].union(*unlabelled[1:]).order_by("name")
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(["Movement"] + type_names)
+    yield buffer.getvalue()
+
+    result = db.session.execute(query.statement.execution_options(stream_results=True))
+    try:
+        blanks = [""]*len(type_names)
+        rows = result.fetchmany(chunk_size)
+        while rows:
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows([name] + blanks for name, in rows)
+            yield buffer.getvalue()
+            rows = result.fetchmany(chunk_size)
+    finally:
+        result.close()
+
+def upload_categories(batches: typing.Iterable[pd.DataFrame]) -> dict:
+    '''Links warm-ups and workouts named in the Movement column of each
+    batch to the movement types flagged 1 in the other columns, adding
+    only the missing links in one transaction. Raises UploadError if a
+    movement is listed twice. Returns counts of movements matched and
+    links added, and seconds per phase'''
+    timer = PhaseTimer()
+    seen = set()
+    n_matched, n_links = 0, 0
+
+    try:
+        with timer.phase("fetch"):
+            type_ids = dict(db.session.query(MoveType.name, MoveType.id))
+
+        for batch in timer.iterate("read", batches):
+            with timer.phase("parse"):
+                if batch["Movement"].duplicated().any() or seen.intersection(batch["Movement"]):
+                    raise UploadError("The file provided has duplicate movements in it.")
+                seen.update(batch["Movement"])
+
+                flags = batch.melt(id_vars="Movement", var_name="move_type", value_name="flag")
+                flags = flags[flags["flag"] == 1]
+                flags = flags.assign(Movement=models.normalize_movements(flags["Movement"]))
+                names = set(flags["Movement"])
+
+            with timer.phase("fetch"):
+                move_ids = {move_model: get_name_ids(move_model, names) for move_model in TYPE_LINKS}
+                n_matched += len(set().union(*(ids.keys() for ids in move_ids.values())))
+
+            with timer.phase("insert_links"):
+                for move_model, (link_table, id_col) in TYPE_LINKS.items():
+                    name_ids = move_ids[move_model]
+                    links = set((type_ids[type_name], name_ids[name])
+                                for name, type_name in zip(flags["Movement"], flags["move_type"])
+                                if name in name_ids and type_name in type_ids)
+
+                    existing = set()
+                    for chunk in chunked(sorted(set(name_ids.values()))):
+                        existing.update(db.session.query(link_table.c.move_type_id, link_table.c[id_col]).filter(
+                            link_table.c[id_col].in_(chunk)))
+
+                    new_links = sorted(links.difference(existing))
+                    if new_links:
+                        db.session.execute(link_table.insert(), [{"move_type_id": type_id, id_col: move_id}
+                                                                 for type_id, move_id in new_links])
+                    n_links += len(new_links)
+
+        with timer.phase("refresh_labels"):
+            models.refresh_labels()
+
+        with timer.phase("commit"):
+            db.session.commit()
+
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return {"movements_matched": n_matched, "links_added": n_links, "timings": timer.timings}
+
+def upload_movements(batches: typing.Iterable[pd.DataFrame]) -> dict:
+    '''Inserts workouts named in the columns of each batch, warm-ups
+    listed in the cells beneath them and the links between them in one
+    transaction. Returns counts of rows added and seconds per phase'''
+    timer = PhaseTimer()
+    summary = {"workouts_added": 0, "warmups_added": 0, "links_added": 0}
+
+    try:
+        for batch in timer.iterate("read", batches):
+            with timer.phase("parse"):
+                cells = batch.melt(var_name="workout", value_name="warmup").dropna()
+                work_names = set(models.normalize_movements(pd.Series(batch.columns, dtype=object)))
+                links = set(zip(models.normalize_movements(cells["workout"]), 
+                                models.normalize_movements(cells["warmup"])))
+                warm_names = set(warm_name for _, warm_name in links)
+
+            with timer.phase("fetch"):
+                work_ids = get_name_ids(Workout, work_names)
+                warm_ids = get_name_ids(Warmup, warm_names)
+
+            with timer.phase("insert_movements"):
+                new_work_names = work_names.difference(work_ids)
+                new_warm_names = warm_names.difference(warm_ids)
+                work_ids.update(insert_names(Workout, new_work_names))
+                warm_ids.update(insert_names(Warmup, new_warm_names))
+
+            with timer.phase("insert_links"):
+                existing = set()
+                old_work_ids = [work_ids[name] for name in work_names.difference(new_work_names)]
+                for chunk in chunked(old_work_ids):
+                    existing.update(db.session.query(models.warm_work.c.warm_id, models.warm_work.c.work_id).filter(
+                        models.warm_work.c.work_id.in_(chunk)))
+
+                new_links = sorted(set((warm_ids[warm_name], work_ids[work_name])
+                                       for work_name, warm_name in links).difference(existing))
+                if new_links:
+                    db.session.execute(models.warm_work.insert(),
+                                       [{"warm_id": warm_id, "work_id": work_id} for warm_id, work_id in new_links])
+
+            summary["workouts_added"] += len(new_work_names)
+            summary["warmups_added"] += len(new_warm_names)
+            summary["links_added"] += len(new_links)
+
+        with timer.phase("refresh_labels"):
+            models.refresh_labels()
+
+        with timer.phase("commit"):
+            db.session.commit()
+
+    except Exception:
+        db.session.rollback()
+        raise
+
+    summary["timings"] = timer.timings
+
+    return summary
+
+
+#helper functions
+def chunked(values: typing.Sequence, size: int = IN_CHUNK_SIZE) -> typing.Iterator[typing.Sequence]:
+    '''Yields consecutive slices of values of at most size items'''
+    values = list(values)
+    for ix in range(0, len(values), size):
+        yield values[ix:ix+size]
+
+def get_name_ids(move_model, names: typing.Iterable[str]) -> typing.Dict[str, int]:
+    '''Returns mapping of name to id for rows of move_model with a name
+    in names'''
+    name_ids = {}
+    for chunk in chunked(sorted(names)):
+        name_ids.update(db.session.query(move_model.name, move_model.id).filter(move_model.name.in_(chunk)))
+
+    return name_ids
+
+def read_error(error: Exception) -> str:
+    '''Returns validation message for error raised reading an upload'''
+    if isinstance(error, UnicodeDecodeError):
+        return "The file provided is invalid. It must be a UTF-8 encoded CSV file."
+
+    return f"The file provided is invalid. It could not be read as a CSV file ({error})."
+
+def insert_names(move_model, names: typing.Iterable[str]) -> typing.Dict[str, int]:
+    '''Inserts a row of move_model for each name in names in bulk and
+    returns mapping of name to new id'''
+    names = sorted(names)
+    if not names:
+        return {}
+
+    db.session.execute(move_model.__table__.insert(), [{"name": name} for name in names])
+
+    return get_name_ids(move_model, names)
@@ -6,17 +6,15 @@ from flask import current_app, request
 import flask_admin
 from flask_admin import base
 from flask_admin.contrib import sqla
+from flask_admin.contrib.sqla import tools
 import flask_login
 from flask_login import current_user
-import inflect
-import pandas as pd
-import time
 from werkzeug import urls
 import wtforms
 from wtforms import validators
 
-from sidekik import db, forms, models
-from sidekik.models import CreatedWarmup, User, MoveType, Warmup, Workout
+from sidekik import auth, catalogue, dashboard, db, forms, models, uploads, warmup_cache
+from sidekik.models import CreatedWarmup, MoveType, User, Warmup, Workout
 
 
 class AccountView(sqla.ModelView):
@@ -35,6 +33,9 @@ class AccountView(sqla.ModelView):
         "password2": wtforms.PasswordField("Confirm Password", validators=[validators.DataRequired()])
     }
 
+    def get_query(self):
+        return super().get_query().options(*models.load_options(User, "admin_list"))
+
     def is_accessible(self):
         if current_user.is_anonymous:
             return False
@@ -56,7 +57,10 @@ class AccountView(sqla.ModelView):
 
         if form.password1.data == form.password2.data:
             if is_valid_password(form.password1.data):
-                user.set_password(form.password1.data)
+                try:
+                    user.set_password(form.password1.data)
+                except auth.HashPoolBusy:
+                    raise validators.ValidationError("The server is busy, please try again shortly")
                 db.session.add(user)
                 db.session.commit()
             else:
@@ -72,11 +76,22 @@ class CreatedWarmupsView(sqla.ModelView):
     can_edit = False
     can_view_details = True
     column_default_sort = ("date")
-    column_details_list = ("date", "ex_time", "workouts", "warmups", "passed")
-    column_labels = {"date": "Date Created", "ex_time": "Time to Create (Seconds)", 
-                     "n_workouts": "Workout Movements Selected", "n_warmups": "Warm-up Movements Suggested",
+    column_details_list = ("date", "ex_time", "nodes_expanded", "spans", "seed", "choice_seed", "workouts", 
+                           "warmups", "passed")
+    column_labels = {"choice_seed": "Choice Seed", "date": "Date Created", 
+                     "ex_time": "Time to Create (Seconds)", "n_workouts": "Workout Movements Selected", 
+                     "n_warmups": "Warm-up Movements Suggested",
+                     "nodes_expanded": "Search Nodes Expanded", "seed": "Solve Seed",
+                     "spans": "Time per Stage (Seconds)",
                      "warmups": "Warm-up Movements", "workouts": "Workout Movements"}
-    column_list = ("date", "ex_time", "n_workouts", "n_warmups", "passed")
+    column_list = ("date", "ex_time", "nodes_expanded", "n_workouts", "n_warmups", "passed")
+
+    def get_one(self, id):
+        return super().get_query().options(*models.load_options(CreatedWarmup, "telemetry_details")).get(
+            tools.iterdecode(id))
+
+    def get_query(self):
+        return super().get_query().options(*models.load_options(CreatedWarmup, "telemetry"))
     
     def is_accessible(self):
         if current_user.is_anonymous:
@@ -97,29 +112,38 @@ class IndexView(flask_admin.AdminIndexView):
         if current_user.is_anonymous:
             return flask.redirect(flask.url_for("admin.login"))
         
-        #create percentages for amount of movements labelled by category (warm-up, workout)
-        lab_warm_moves = [row.is_labelled for row in Warmup.query.all()]
-        lab_warm_perc = round(100*sum(lab_warm_moves)/len(lab_warm_moves), 2) if len(lab_warm_moves) else 0
-
-        lab_work_moves = [row.is_labelled for row in Workout.query.all()]
-        lab_work_perc = round(100*sum(lab_work_moves)/len(lab_work_moves), 2) if len(lab_work_moves) else 0
-
-        n_warmups = CreatedWarmup.query.count()
-
-        return self.render("admin/index.html", n_warmups=n_warmups, lab_work_perc=lab_work_perc,
-                           lab_warm_perc=lab_warm_perc)
+        return self.render("admin/index.html", stats=dashboard.get_stats(), 
+                           cache_stats=warmup_cache.stats())
 
     @flask_admin.expose('/login', methods=["GET", "POST"])
     def login(self):
         form = forms.LoginForm()
 
         if form.validate_on_submit():
-            user = User.query.filter_by(email=form.email.data).first()
+            if not auth.throttle.allow(request.remote_addr, form.email.data):
+                flask.flash("Too many sign in attempts, please try again later")
+                return self.render("admin/login.html", form=form, title="Login"), 429
+
+            user = User.query.options(*models.load_options(User, "auth")).filter_by(
+                email=form.email.data).first()
+
+            try:
+                valid = auth.hash_pool.check(user.password if user else None, form.password.data)
+            except auth.HashPoolBusy:
+                flask.flash("The server is busy, please try again shortly")
+                return self.render("admin/login.html", form=form, title="Login"), 503
 
-            if not user or not user.check_password(form.password.data):
+            if not valid:
                 flask.flash("Invalid email or password")
                 return flask.redirect(flask.url_for("admin.login"))
 
+            if user.needs_rehash():
+                try:
+                    user.set_password(form.password.data)
+                    db.session.commit()
+                except auth.HashPoolBusy:
+                    current_app.logger.warning(f"Skipped rehashing password of user {user.id}, pool busy")
+
             flask_login.login_user(user, remember=form.remember_me.data)
             next_page = request.args.get("next")
 
@@ -142,6 +166,12 @@ class MoveTypeView(sqla.ModelView):
     column_default_sort = ("name")
     column_list = ("name", "description")
     
+    def after_model_change(self, form, model, is_created):
+        catalogue.invalidate()
+
+    def after_model_delete(self, model):
+        catalogue.invalidate()
+
     def is_accessible(self):
         if current_user.is_anonymous:
             return False
@@ -178,52 +208,30 @@ class UploadMoveCatView(flask_admin.BaseView):
 
         form = forms.UploadMoveCatForm()
 
+        summary = None
         if form.validate_on_submit():
-            inf_eng = inflect.engine()
-            form.df["Movement"] = form.df["Movement"].apply(models.parse_movement, inf_eng=inf_eng)
-
-            ix_updated = []
-            for move_model in [Warmup, Workout]:
-                move_rows = move_model.query.filter(move_model.name.in_(form.df["Movement"])).all()
-                for row in move_rows:
-                    df_row = form.df[form.df["Movement"] == row.name]
-
-                    for type_name in df_row.iloc[0][df_row.iloc[0] == 1].index:
-                        move_type = MoveType.query.filter_by(name=type_name).first()
-
-                        if move_type not in row.move_types:
-                            row.move_types.append(move_type)
-                    
-                    db.session.add(row)
-                    ix_updated.append(df_row.index[0])
-            
-            db.session.commit()
+            try:
+                summary = uploads.upload_categories(form.upload.batches())
+            except uploads.UploadError as error:
+                form.fmoves.errors.append(str(error))
+
+        if summary:
+            catalogue.invalidate()
+
+            timings = ", ".join(f"{phase}: {secs}" for phase, secs in summary["timings"].items())
+            current_app.logger.info((f"[*] Movement descriptions uploaded. Movements matched: "
+                                     f"{summary['movements_matched']}. Links added: {summary['links_added']}. "
+                                     f"Time to load ({timings})"))
             flask.flash("Movement descriptions uploaded")
         
-        move_types = sorted(MoveType.query.all(), key=lambda row: row.name)
+        move_types = MoveType.query.order_by(MoveType.name).all()
 
         return self.render("admin/upload/categories.html", form=form, move_types=move_types)
 
     @flask_admin.expose("/movement_description.csv")
     def download(self):
-        def generate_data():
-            df = pd.DataFrame(sorted(set(
-                [row.name for row in Workout.query.all() if len(row.move_types) == 0] + 
-                [row.name for row in Warmup.query.all() if len(row.move_types) == 0]
-            )), columns=["Movement"])
-
-            df[sorted([row.name for row in MoveType.query.all()])] = ""
-
-            print(df.head())
-
-            #yield header
-            yield ",".join(df.columns) + "\n"
-
-            #yield data
-            for _, row in df.iterrows():
-                yield  ",".join(row) + "\n"
-                    
-        return flask.Response(flask.stream_with_context(generate_data()), mimetype='text/csv')
+        return flask.Response(flask.stream_with_context(uploads.generate_unlabelled_csv()), 
+                              mimetype='text/csv')
 
     def is_accessible(self):
         if current_user.is_anonymous:
@@ -244,37 +252,21 @@ class UploadMovesView(flask_admin.BaseView):
         form = forms.UploadMovesForm()
         data = {}
 
+        summary = None
         if form.validate_on_submit():
-            inf_eng = inflect.engine()
-
-            for work_move in form.df.columns:
-                t_init = time.time()
-
-                cl_work_move = models.parse_movement(work_move, inf_eng)
-                work_row = Workout.query.filter_by(name=cl_work_move).first()
-
-                if not work_row:
-                    work_row = models.Workout(name=cl_work_move)
-
-                for warm_move in form.df[work_move].dropna():
-                    cl_warm_move = models.parse_movement(warm_move, inf_eng)
-                    warm_row = Warmup.query.filter_by(name=cl_warm_move).first()
-                
-                    if not warm_row:
-                        warm_row = models.Warmup(name=cl_warm_move)
-                        db.session.add(warm_row)
-                        db.session.commit()
-                        
-                    if warm_row not in work_row.warmups:
-                        work_row.warmups.append(warm_row)
-
-                work_row.warmups = sorted(work_row.warmups, key=lambda move: move.name)
-                db.session.add(work_row)
-
-                current_app.logger.info((f"[*] Movement: {cl_work_move}. Time to load: "
-                                         f"{round(time.time() - t_init, 4)}"))
-
-            db.session.commit()
+            try:
+                summary = uploads.upload_movements(form.upload.batches())
+            except uploads.UploadError as error:
+                form.fmoves.errors.append(str(error))
+
+        if summary:
+            catalogue.invalidate()
+
+            timings = ", ".join(f"{phase}: {secs}" for phase, secs in summary["timings"].items())
+            current_app.logger.info((f"[*] Movements uploaded. Workouts added: {summary['workouts_added']}. "
+                                     f"Warm-ups added: {summary['warmups_added']}. Links added: "
+                                     f"{summary['links_added']}. Time to load ({timings})"))
+            data["summary"] = summary
             data["moves_uploaded"] = True
 
         return self.render("admin/upload/movements.html", form=form, data=data)
@@ -299,6 +291,19 @@ class WarmupView(sqla.ModelView):
     column_list = ("name", "is_labelled")
     form_columns = ("name", "move_types", "workouts")
     
+    def after_model_change(self, form, model, is_created):
+        catalogue.invalidate()
+
+    def after_model_delete(self, model):
+        catalogue.invalidate()
+
+    def get_one(self, id):
+        query = super().get_query().options(*models.load_options(Warmup, "catalogue"))
+        return query.get(tools.iterdecode(id))
+
+    def get_query(self):
+        return super().get_query().options(*models.load_options(Warmup, "admin_list"))
+
     def is_accessible(self):
         if current_user.is_anonymous:
             return False
@@ -319,6 +324,19 @@ class WorkoutView(sqla.ModelView):
     column_list = ("name", "is_labelled")
     form_columns = ("name", "move_types", "warmups")
     
+    def after_model_change(self, form, model, is_created):
+        catalogue.invalidate()
+
+    def after_model_delete(self, model):
+        catalogue.invalidate()
+
+    def get_one(self, id):
+        query = super().get_query().options(*models.load_options(Workout, "catalogue"))
+        return query.get(tools.iterdecode(id))
+
+    def get_query(self):
+        return super().get_query().options(*models.load_options(Workout, "admin_list"))
+
     def is_accessible(self):
         if current_user.is_anonymous:
             return False
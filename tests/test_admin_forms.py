@@ -106,6 +106,24 @@ class TestAdminForms(unittest.TestCase):
         })
         self.assertIn(b"The password provided is an invalid format", response.data)
 
+    def test_delete_movements(self):
+        '''validates bulk deleted warm-ups removed with their movement
+        type and workout links'''
+        with self.app_context:
+            models.create_movement_types()
+
+        push = models.MoveType.query.filter_by(name="Push").first()
+        warm_row = Warmup(name="Wall Ball", move_types=[push])
+        add_to_db(self.app_context, Workout(name="Thruster", warmups=[warm_row]))
+
+        response = self.test_client.post("/admin/warmup/action/", data={"action": "delete", 
+                                                                        "rowid": warm_row.id})
+        self.assertEqual(response.status_code, 302)
+
+        self.assertEqual(Warmup.query.count(), 0)
+        for table in [models.warm_types, models.warm_work]:
+            self.assertEqual(db.session.query(table).count(), 0)
+
     def test_movements_upload(self):
         '''validates movements uploaded to respective tables when file
         is correct'''
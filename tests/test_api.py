@@ -0,0 +1,163 @@
+'''Unit tests for the JSON warm-up API'''
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import sidekik
+from sidekik import catalogue, config, db, models
+from sidekik.models import CreatedWarmup, MoveType
+
+
+class TestApi(unittest.TestCase):
+    '''test class for warm-up API endpoints'''
+    #setup
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_dpath = tempfile.mkdtemp()
+        cls.config = config.TestConfig
+        cls.config.SQLALCHEMY_DATABASE_URI = cls.config.SQLALCHEMY_DATABASE_URI.format(
+            temp_dpath=cls.temp_dpath
+        )
+
+        cls.app = sidekik.create_app(cls.config)
+        cls.app_context = cls.app.app_context()
+        cls.app_context.push()
+        cls.test_client = cls.app.test_client()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.app_context.pop()
+        shutil.rmtree(cls.temp_dpath)
+
+    def setUp(self):
+        with self.app_context:
+            db.create_all()
+            models.create_movement_types()
+
+        push, squat = [MoveType.query.filter_by(name=name).first() for name in ["Push", "Squat"]]
+        air_squat = models.Warmup(name="Air Squat", move_types=[squat])
+        push_up = models.Warmup(name="Push-Up", move_types=[push])
+        wall_ball = models.Warmup(name="Wall Ball", move_types=[push, squat])
+
+        add_to_db(self.app_context, models.Workout(name="Thruster", warmups=[air_squat, push_up, wall_ball]))
+        add_to_db(self.app_context, models.Workout(name="Front Squat", warmups=[air_squat]))
+        add_to_db(self.app_context, models.Workout(name="Row"))
+
+    def tearDown(self):
+        with self.app_context:
+            db.session.remove()
+            db.drop_all()
+
+        catalogue.invalidate()
+
+    #unit tests
+    def test_create_warmup(self):
+        '''validates warm-up returned and recorded for a selection'''
+        response = self.test_client.post("/api/warmups", json={"workouts": ["thruster"]})
+        self.assertEqual(response.status_code, 200)
+
+        data = response.get_json()
+        self.assertTrue(data["passed"])
+        self.assertEqual(data["workouts"], ["Thruster"])
+        self.assertEqual(data["options"], [["Air Squat", "Push-Up"], ["Wall Ball"]])
+        self.assertIn(data["warmup"], data["options"])
+
+        created_warmup = CreatedWarmup.query.one()
+        self.assertEqual([row.name for row in created_warmup.workouts], ["Thruster"])
+        self.assertEqual([row.name for row in created_warmup.warmups], data["warmup"])
+        self.assertEqual((created_warmup.seed, created_warmup.choice_seed), (data["seed"], data["choice_seed"]))
+
+    def test_failed_warmup(self):
+        '''validates failed warm-ups are returned and recorded'''
+        response = self.test_client.post("/api/warmups", json={"workouts": ["Row"]})
+        data = response.get_json()
+        self.assertFalse(data["passed"])
+        self.assertEqual(data["warmup"], [])
+        self.assertIsNone(data["choice_seed"])
+        self.assertFalse(CreatedWarmup.query.one().passed)
+
+    def test_bad_requests(self):
+        '''validates errors returned for invalid selections'''
+        response = self.test_client.post("/api/warmups", json={"workouts": ["Thruster", "Burpee"]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json()["unknown"], ["Burpee"])
+
+        response = self.test_client.post("/api/warmups", json={"workouts": "Thruster"})
+        self.assertEqual(response.status_code, 400)
+
+        for data in [["Thruster"], "Thruster", [["Thruster"]], None]:
+            for url in ["/api/warmups", "/api/warmups/batch"]:
+                response = self.test_client.post(url, json=data)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("Expected a JSON object", response.get_json()["error"])
+
+        response = self.test_client.post("/api/warmups/batch", json={"selections": [["Thruster"], []]})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("selection 1", response.get_json()["error"])
+        self.assertEqual(CreatedWarmup.query.count(), 0)
+
+    def test_batch(self):
+        '''validates batch results returned in order and recorded in
+        bulk'''
+        response = self.test_client.post("/api/warmups/batch", json={"selections": [
+            ["Thruster"], ["Front Squat"], ["Thruster"], ["Row"]
+        ]})
+        results = response.get_json()["results"]
+
+        self.assertEqual([result["workouts"] for result in results], 
+                         [["Thruster"], ["Front Squat"], ["Thruster"], ["Row"]])
+        self.assertEqual([result["passed"] for result in results], [True, True, True, False])
+        self.assertEqual(results[1]["warmup"], ["Air Squat"])
+        self.assertEqual(results[0]["options"], results[2]["options"])
+        self.assertEqual(CreatedWarmup.query.count(), 4)
+
+    def test_shared_name_keys(self):
+        '''validates workouts differing only in case are all kept, the
+        one named exactly as entered matched first'''
+        air_squat = models.Warmup.query.filter_by(name="Air Squat").first()
+        add_to_db(self.app_context, models.Workout(name="FRONT SQUAT", warmups=[air_squat]))
+
+        def workouts(selection):
+            response = self.test_client.post("/api/warmups", json={"workouts": selection})
+            return response.get_json()["workouts"]
+
+        self.assertEqual(workouts(["FRONT  SQUAT"]), ["FRONT SQUAT"])
+        self.assertEqual(workouts(["Front Squat"]), ["Front Squat"])
+        self.assertEqual(workouts(["front squat"]), ["FRONT SQUAT", "Front Squat"])
+
+        response = self.test_client.get("/api/workouts/suggest", query_string={"q": "front"})
+        self.assertEqual(response.get_json()["suggestions"], ["FRONT SQUAT", "Front Squat"])
+
+    def test_suggest_workouts(self):
+        '''validates labelled workouts suggested by word prefix, name
+        prefix first, then by close match'''
+        add_to_db(self.app_context, models.Workout(name="Squat Clean", warmups=[models.Warmup.query.first()]))
+
+        def suggest(query):
+            return self.test_client.get("/api/workouts/suggest", query_string={"q": query}).get_json()
+
+        self.assertEqual(suggest("squ")["suggestions"], ["Squat Clean", "Front Squat"])
+        self.assertEqual(suggest("THR")["suggestions"], ["Thruster"])
+        self.assertEqual(suggest("thuster")["suggestions"], ["Thruster"])
+        self.assertEqual(suggest("ro")["suggestions"], [])
+        self.assertEqual(suggest(" ")["suggestions"], [])
+
+        self.app.config.update(SUGGEST_LIMIT=1)
+        try:
+            with mock.patch.object(catalogue.difflib, "get_close_matches") as get_close_matches:
+                self.assertEqual(suggest("squ")["suggestions"], ["Squat Clean"])
+            get_close_matches.assert_not_called()
+        finally:
+            self.app.config.update(SUGGEST_LIMIT=config.TestConfig.SUGGEST_LIMIT)
+
+
+def add_to_db(app_context, row) -> None:
+    '''adds row to db and commits'''
+    with app_context:
+        db.session.add(row)
+        db.session.commit()
+
+
+if __name__ == "__main__":
+    unittest.main()
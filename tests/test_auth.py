@@ -0,0 +1,162 @@
+'''Unit tests for password hashing and login throttling'''
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from werkzeug import security
+
+import sidekik
+from sidekik import auth, config, db, models
+
+
+class TestAuth(unittest.TestCase):
+    '''test class for hashing pool, login throttle and hash upgrades'''
+    #setup
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_dpath = tempfile.mkdtemp()
+        cls.config = config.TestConfig
+        cls.config.SQLALCHEMY_DATABASE_URI = cls.config.SQLALCHEMY_DATABASE_URI.format(
+            temp_dpath=cls.temp_dpath
+        )
+
+        cls.app = sidekik.create_app(cls.config)
+        cls.app_context = cls.app.app_context()
+        cls.app_context.push()
+        cls.test_client = cls.app.test_client()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.app_context.pop()
+        shutil.rmtree(cls.temp_dpath)
+
+    def setUp(self):
+        with self.app_context:
+            db.create_all()
+
+        auth.throttle.clear()
+        self.email = "dummy_user@email.com"
+        self.phrase = "DummyPassword123"
+
+    def tearDown(self):
+        self.app.config.update(PASSWORD_HASH_METHOD=config.TestConfig.PASSWORD_HASH_METHOD)
+        auth.hash_pool.init_app(self.app)
+
+        with self.app_context:
+            db.session.remove()
+            db.drop_all()
+
+    #unit tests
+    def test_dummy_hash(self):
+        '''validates unknown emails checked against a dummy hash made in
+        init_app or in the pool, never on the request thread'''
+        hashed_in = []
+        generate_password_hash = security.generate_password_hash
+        def tracked_hash(password, **kwargs):
+            hashed_in.append(threading.current_thread().name)
+            return generate_password_hash(password, **kwargs)
+
+        with mock.patch.object(security, "generate_password_hash", tracked_hash):
+            self.assertFalse(auth.hash_pool.check(None, self.phrase))
+            self.assertEqual(hashed_in, [])
+
+            hash_pool = auth.HashPool()
+            self.assertFalse(hash_pool.check(None, self.phrase))
+            self.assertFalse(hash_pool.check(None, self.phrase))
+            self.assertEqual(len(hashed_in), 1)
+            self.assertTrue(hashed_in[0].startswith("password-hash"))
+            hash_pool.shutdown()
+
+    def test_get_method(self):
+        '''validates default pbkdf2 iterations filled in methods'''
+        pwhash = security.generate_password_hash(self.phrase)
+        self.assertEqual(auth.get_method(pwhash), auth.get_method("pbkdf2:sha256"))
+        self.assertNotEqual(auth.get_method(pwhash), auth.get_method("pbkdf2:sha256:1000"))
+
+    def test_hash_pool_busy(self):
+        '''validates hashes beyond the pool's slots rejected'''
+        hash_pool = auth.HashPool()
+        self.app.config.update(PASSWORD_HASH_WORKERS=1, PASSWORD_HASH_QUEUE=0)
+        hash_pool.init_app(self.app)
+        self.app.config.update(PASSWORD_HASH_WORKERS=config.TestConfig.PASSWORD_HASH_WORKERS,
+                               PASSWORD_HASH_QUEUE=config.TestConfig.PASSWORD_HASH_QUEUE)
+
+        started, release = threading.Event(), threading.Event()
+        def blocked_check(pwhash, password):
+            started.set()
+            release.wait()
+            return True
+
+        with mock.patch.object(security, "check_password_hash", blocked_check):
+            thread = threading.Thread(target=hash_pool.check, args=("hash", self.phrase))
+            thread.start()
+            started.wait()
+            with self.assertRaises(auth.HashPoolBusy):
+                hash_pool.check("hash", self.phrase)
+            release.set()
+            thread.join()
+
+        self.assertTrue(hash_pool.check(hash_pool.hash(self.phrase), self.phrase))
+        hash_pool.shutdown()
+
+    def test_login_throttle(self):
+        '''validates attempts limited per ip and per email'''
+        throttle = auth.LoginThrottle()
+        self.app.config.update(LOGIN_ATTEMPTS=2)
+        throttle.init_app(self.app)
+        self.app.config.update(LOGIN_ATTEMPTS=config.TestConfig.LOGIN_ATTEMPTS)
+
+        self.assertTrue(throttle.allow("1.1.1.1", "a@email.com"))
+        self.assertTrue(throttle.allow("1.1.1.1", "A@email.com "))
+        self.assertFalse(throttle.allow("2.2.2.2", "a@email.com"))
+        self.assertTrue(throttle.allow("2.2.2.2", "b@email.com"))
+        self.assertFalse(throttle.allow("1.1.1.1", "c@email.com"))
+
+    def test_login_throttled(self):
+        '''validates login rejected once the ip's attempts are used'''
+        for _ in range(self.app.config["LOGIN_ATTEMPTS"]):
+            response = self.test_client.post("/admin/login", data={"email": self.email, "password": self.phrase})
+            self.assertEqual(response.status_code, 302)
+
+        response = self.test_client.post("/admin/login", data={"email": self.email, "password": self.phrase})
+        self.assertEqual(response.status_code, 429)
+        self.assertIn(b"Too many sign in attempts", response.data)
+
+    def test_login_throttled_forwarded(self):
+        '''validates attempts limited per client ip forwarded by the
+        trusted proxy'''
+        for ix in range(self.app.config["LOGIN_ATTEMPTS"]):
+            response = self.test_client.post("/admin/login", data={"email": f"{ix}{self.email}", 
+                                                                   "password": self.phrase},
+                                             headers={"X-Forwarded-For": "1.1.1.1"})
+            self.assertEqual(response.status_code, 302)
+
+        data = {"email": self.email, "password": self.phrase}
+        response = self.test_client.post("/admin/login", data=data, 
+                                         headers={"X-Forwarded-For": "9.9.9.9, 1.1.1.1"})
+        self.assertEqual(response.status_code, 429)
+
+        response = self.test_client.post("/admin/login", data=data, headers={"X-Forwarded-For": "2.2.2.2"})
+        self.assertEqual(response.status_code, 302)
+
+    def test_password_rehash(self):
+        '''validates password rehashed with the configured method on login'''
+        user = models.User(email=self.email)
+        user.password = security.generate_password_hash(self.phrase, method="pbkdf2:sha256:1000")
+        db.session.add(user)
+        db.session.commit()
+
+        self.assertTrue(user.needs_rehash())
+        response = self.test_client.post("/admin/login", data={"email": self.email, "password": self.phrase},
+                                         follow_redirects=True)
+        self.assertIn(b"Warm-ups Created", response.data)
+
+        user = models.User.query.filter_by(email=self.email).first()
+        self.assertFalse(user.needs_rehash())
+        self.assertTrue(user.check_password(self.phrase))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+'''Unit tests for in-process caches'''
+import time
+import unittest
+
+from sidekik import cache
+
+
+class TestTTLCache(unittest.TestCase):
+    '''test class for LRU/TTL cache'''
+    #unit tests
+    def test_delete(self):
+        '''validates entry removed by delete and missing keys ignored'''
+        ttl_cache = cache.TTLCache(maxsize=2)
+        ttl_cache.set("a", 1)
+        ttl_cache.delete("a")
+        ttl_cache.delete("b")
+
+        self.assertEqual(len(ttl_cache), 0)
+        self.assertIsNone(ttl_cache.get("a"))
+
+    def test_hits_and_misses(self):
+        '''validates hits and misses counted on get'''
+        ttl_cache = cache.TTLCache(maxsize=2)
+        self.assertIsNone(ttl_cache.get("a"))
+        ttl_cache.set("a", 1)
+        self.assertEqual(ttl_cache.get("a"), 1)
+
+        stats = ttl_cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["hit_ratio"]), (1, 1, 0.5))
+
+    def test_lru_eviction(self):
+        '''validates least recently used entry evicted beyond maxsize'''
+        ttl_cache = cache.TTLCache(maxsize=2)
+        ttl_cache.set("a", 1)
+        ttl_cache.set("b", 2)
+        ttl_cache.get("a")
+        ttl_cache.set("c", 3)
+
+        self.assertEqual(len(ttl_cache), 2)
+        self.assertIsNone(ttl_cache.get("b"))
+        self.assertEqual(ttl_cache.get("a"), 1)
+        self.assertEqual(ttl_cache.stats()["evictions"], 1)
+
+    def test_ttl_expiry(self):
+        '''validates entries expire after ttl seconds'''
+        ttl_cache = cache.TTLCache(maxsize=2, ttl=0.05)
+        ttl_cache.set("a", 1)
+        self.assertEqual(ttl_cache.get("a"), 1)
+
+        time.sleep(0.1)
+        self.assertIsNone(ttl_cache.get("a"))
+        self.assertEqual(len(ttl_cache), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+'''Unit tests for admin dashboard metrics'''
+from datetime import datetime, timedelta
+import shutil
+import tempfile
+import unittest
+
+import sidekik
+from sidekik import config, dashboard, dashboard_cache, db, models
+from sidekik.models import CreatedWarmup, Warmup, Workout
+
+
+class TestDashboard(unittest.TestCase):
+    '''Test class for aggregate dashboard stats'''
+    #setup
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_dpath = tempfile.mkdtemp()
+        cls.config = config.TestConfig
+        cls.config.SQLALCHEMY_DATABASE_URI = cls.config.SQLALCHEMY_DATABASE_URI.format(
+            temp_dpath=cls.temp_dpath
+        )
+
+        cls.app = sidekik.create_app(cls.config)
+        cls.app_context = cls.app.app_context()
+        cls.app_context.push()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.app_context.pop()
+        shutil.rmtree(cls.temp_dpath)
+
+    def setUp(self):
+        with self.app_context:
+            db.create_all()
+
+    def tearDown(self):
+        dashboard_cache.clear()
+
+        with self.app_context:
+            db.session.remove()
+            db.drop_all()
+
+    #unit tests
+    def test_compute_stats(self):
+        '''validates labelling percentages, pass rate and ex_time
+        percentiles over the window'''
+        push = models.MoveType(name="Push", description="N/A")
+        db.session.add_all([Warmup(name="Air Squat", move_types=[push]), Warmup(name="Wall Ball"),
+                            Warmup(name="Push-Up", move_types=[push]), Workout(name="Thruster")])
+        last_month = datetime.utcnow() - timedelta(days=30)
+        db.session.add_all([CreatedWarmup(ex_time=ex_time, passed=True) for ex_time in range(1, 20)] + 
+                           [CreatedWarmup(ex_time=None, passed=False), 
+                            CreatedWarmup(ex_time=100, passed=True, date=last_month)])
+        db.session.commit()
+
+        stats = dashboard.compute_stats(7)
+        self.assertEqual((stats["lab_warm_perc"], stats["lab_work_perc"]), (66.67, 0))
+        self.assertEqual((stats["n_warmups"], stats["n_window"], stats["pass_rate"]), (21, 20, 95.0))
+        self.assertEqual((stats["ex_time_p50"], stats["ex_time_p95"]), (10, 19))
+
+    def test_empty_stats(self):
+        '''validates stats of empty tables and cached stats'''
+        stats = dashboard.get_stats()
+        self.assertEqual((stats["lab_warm_perc"], stats["n_window"], stats["pass_rate"], stats["ex_time_p50"]),
+                         (0, 0, None, None))
+
+        db.session.add(CreatedWarmup(ex_time=1, passed=True))
+        db.session.commit()
+        self.assertEqual(dashboard.get_stats()["n_warmups"], 0)
+        self.assertEqual(dashboard_cache.stats()["hits"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
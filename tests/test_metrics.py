@@ -0,0 +1,129 @@
+'''Unit tests for the metrics endpoint'''
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import sidekik
+from sidekik import catalogue, config, db, metrics, models, warmup_cache
+from sidekik.models import MoveType
+
+
+class TestMetrics(unittest.TestCase):
+    '''test class for /metrics and per-process metric files'''
+    #setup
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_dpath = tempfile.mkdtemp()
+        cls.config = config.TestConfig
+        cls.config.SQLALCHEMY_DATABASE_URI = cls.config.SQLALCHEMY_DATABASE_URI.format(
+            temp_dpath=cls.temp_dpath
+        )
+
+        cls.app = sidekik.create_app(cls.config)
+        cls.app_context = cls.app.app_context()
+        cls.app_context.push()
+        cls.test_client = cls.app.test_client()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.app_context.pop()
+        shutil.rmtree(cls.temp_dpath)
+
+    def setUp(self):
+        with self.app_context:
+            db.create_all()
+            models.create_movement_types()
+
+        push, squat = [MoveType.query.filter_by(name=name).first() for name in ["Push", "Squat"]]
+        db.session.add(models.Workout(name="Thruster", warmups=[models.Warmup(name="Wall Ball",
+                                                                              move_types=[push, squat])]))
+        db.session.add(models.Workout(name="Row"))
+        db.session.commit()
+
+        metrics.registry.clear()
+
+    def tearDown(self):
+        metrics.registry.directory = None
+        self.app.config.update(METRICS_TOKEN=None)
+
+        with self.app_context:
+            db.session.remove()
+            db.drop_all()
+
+        catalogue.invalidate()
+        warmup_cache.clear()
+
+    #unit tests
+    def test_metrics(self):
+        '''validates request, warm-up, SQL and cache metrics rendered'''
+        self.test_client.post("/api/warmups", json={"workouts": ["Thruster"]})
+        self.test_client.post("/api/warmups", json={"workouts": ["Row"]})
+
+        response = self.test_client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        text = response.get_data(as_text=True)
+
+        self.assertIn('sidekik_request_seconds_count{endpoint="api.create_warmup"} 2', text)
+        self.assertIn('sidekik_warmups_created_total{passed="true"} 1.0', text)
+        self.assertIn('sidekik_warmups_created_total{passed="false"} 1.0', text)
+        self.assertIn("sidekik_warmup_solve_seconds_count 2", text)
+        self.assertIn('sidekik_warmup_nodes_expanded_bucket{le="+Inf"} 2', text)
+        self.assertIn('sidekik_cache_misses_total{cache="warmup"} 2', text)
+        self.assertRegex(text, r"sidekik_db_statement_seconds_count [1-9]")
+
+    def test_metrics_token(self):
+        '''validates metrics hidden without METRICS_TOKEN when set'''
+        self.app.config.update(METRICS_TOKEN="secret")
+        self.assertEqual(self.test_client.get("/metrics").status_code, 404)
+
+        response = self.test_client.get("/metrics", headers={"Authorization": "Bearer secret"})
+        self.assertEqual(response.status_code, 200)
+
+    def test_worker_files(self):
+        '''validates metrics of every worker's file summed'''
+        metrics_dpath = os.path.join(self.temp_dpath, "metrics")
+        os.makedirs(metrics_dpath, exist_ok=True)
+        metrics.clear_files(metrics_dpath)
+        metrics.registry.directory = metrics_dpath
+
+        other = {"counters": [["sidekik_warmups_created_total", [["passed", "true"]], 3]],
+                 "histograms": [["sidekik_warmup_nodes_expanded", [], [0, 2] + [0]*9 + [3]]]}
+        with open(os.path.join(metrics_dpath, "metrics_1.json"), "w") as fout:
+            json.dump(other, fout)
+
+        metrics.registry.inc("sidekik_warmups_created_total", {"passed": "true"})
+        metrics.registry.observe("sidekik_warmup_nodes_expanded", 4)
+        text = metrics.registry.render()
+
+        self.assertIn('sidekik_warmups_created_total{passed="true"} 4.0', text)
+        self.assertIn('sidekik_warmup_nodes_expanded_bucket{le="5"} 3', text)
+        self.assertIn("sidekik_warmup_nodes_expanded_sum 7", text)
+        self.assertIn(f"metrics_{os.getpid()}.json", os.listdir(metrics_dpath))
+
+    def test_worker_files_removed(self):
+        '''validates files of exited workers removed, and all files
+        cleared on start'''
+        metrics_dpath = os.path.join(self.temp_dpath, "metrics")
+        os.makedirs(metrics_dpath, exist_ok=True)
+        metrics.registry.directory = metrics_dpath
+
+        for pid in [1, 2]:
+            with open(os.path.join(metrics_dpath, f"metrics_{pid}.json"), "w") as fout:
+                json.dump({"counters": [["sidekik_warmups_created_total", [["passed", "true"]], 3]], 
+                           "histograms": []}, fout)
+
+        metrics.remove_file(metrics_dpath, 1)
+        metrics.remove_file(metrics_dpath, 1)
+        self.assertIn('sidekik_warmups_created_total{passed="true"} 3.0', metrics.registry.render())
+
+        metrics.registry.remove_file()
+        self.assertEqual(os.listdir(metrics_dpath), ["metrics_2.json"])
+
+        metrics.clear_files(metrics_dpath)
+        self.assertEqual(os.listdir(metrics_dpath), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,12 +4,13 @@ from os import path
 import shutil
 import tempfile
 import unittest
+from unittest import mock
 from werkzeug import datastructures
 
 
 import sidekik
-from sidekik import config, db, models
-from sidekik.models import Role, Warmup, Workout
+from sidekik import catalogue, config, db, models, movements, warmup_cache
+from sidekik.models import CreatedWarmup, PrecomputedWarmup, Role, Warmup, Workout
 
 
 
@@ -56,12 +57,170 @@ class TestIndex(unittest.TestCase):
             db.session.remove()
             db.drop_all()
 
+        catalogue.invalidate()
+
     #unit tests
     def test_page_exists(self):
         '''validates page exists'''
         response = self.test_client.get("/", follow_redirects=True)
         self.assertEqual(response.status_code, 200)
 
+    def test_catalogue_snapshot(self):
+        '''validates snapshot holds uploaded movements, is invalidated
+        by uploads and is used to record created warm-ups'''
+        with self.app_context:
+            models.create_movement_types()
+
+        self.assertEqual(catalogue.get_snapshot().workouts, {})
+        upload_test_movements(self.test_client)
+
+        snapshot = catalogue.get_snapshot()
+        self.assertIs(snapshot, catalogue.get_snapshot())
+        self.assertEqual(list(snapshot.labelled_workouts), ["Power Snatch", "Running", "Snatch"])
+        self.assertEqual(dict(snapshot.labelled_keys), {"power snatch": ("Power Snatch",), "running": ("Running",),
+                                                        "snatch": ("Snatch",)})
+        self.assertEqual(snapshot.workout_ids(["Snatch", "Unknown"]), [snapshot.workouts["Snatch"][0]])
+
+        coverage = snapshot.coverage(["Snatch"])
+        self.assertEqual(coverage.types, ("Hinge", "Pull", "Push", "Squat"))
+        self.assertEqual(coverage.names, ("Muscle Snatch", "Overhead Squat", "Push Press", "Strict Press"))
+
+        self.test_client.post("/", data={"moves-0-move": "Snatch"})
+        created_warmup = CreatedWarmup.query.one()
+        self.assertTrue(created_warmup.passed)
+        self.assertEqual([row.name for row in created_warmup.workouts], ["Snatch"])
+        self.assertTrue(created_warmup.warmups)
+
+    def test_precompute_warmups(self):
+        '''validates precompute command stores options for workout
+        combinations and index view reads them for the solver engine and
+        precomputed sizes only'''
+        with self.app_context:
+            models.create_movement_types()
+
+        upload_test_movements(self.test_client)
+
+        result = self.app.test_cli_runner().invoke(args=["precompute-warmups", "--max-size", "2"])
+        self.assertIn("Stored warm-up options for 6 workout combinations", result.output)
+        self.assertEqual(PrecomputedWarmup.query.count(), 6)
+
+        snapshot = catalogue.get_snapshot()
+        precomputed = PrecomputedWarmup.query.filter_by(
+            selection=PrecomputedWarmup.make_selection(snapshot.workout_ids(["Running", "Snatch"]))
+        ).one()
+        precomputed.options = '[["Calf Raise"]]'
+        db.session.commit()
+        warmup_cache.clear()
+
+        response = self.test_client.post("/", data={"moves-0-move": "Snatch", "moves-1-move": "Running"})
+        soup = bs4.BeautifulSoup(response.data, "html.parser")
+        self.assertEqual([item.text for item in soup.find(id="warmup").find_all("li")], ["Calf Raise"])
+
+        for setting in [{"WARMUP_SOLVER": "exact"}, {"PRECOMPUTE_MAX_SIZE": 1}]:
+            original = {name: self.app.config[name] for name in setting}
+            self.app.config.update(setting)
+            warmup_cache.clear()
+            try:
+                response = self.test_client.post("/", data={"moves-0-move": "Snatch", "moves-1-move": "Running"})
+                soup = bs4.BeautifulSoup(response.data, "html.parser")
+                self.assertNotEqual([item.text for item in soup.find(id="warmup").find_all("li")], ["Calf Raise"])
+            finally:
+                self.app.config.update(original)
+
+        result = self.app.test_cli_runner().invoke(args=["precompute-warmups", "--max-size", "0"])
+        self.assertIn("Stored warm-up options for 0 workout combinations", result.output)
+        self.assertEqual(PrecomputedWarmup.query.count(), 0)
+
+    def test_replay_warmup(self):
+        '''validates warm-ups recorded with their seeds replay exactly,
+        cached repeats choose with their own seed, and deterministic mode
+        seeds selections alike'''
+        with self.app_context:
+            models.create_movement_types()
+
+        upload_test_movements(self.test_client)
+        warmup_cache.clear()
+
+        for _ in range(2):
+            self.test_client.post("/", data={"moves-0-move": "Snatch", "moves-1-move": "Running"})
+        self.assertEqual(warmup_cache.stats()["hits"], 1)
+
+        created_warmups = CreatedWarmup.query.order_by(CreatedWarmup.id).all()
+        self.assertEqual(created_warmups[0].seed, created_warmups[1].seed)
+        self.assertNotEqual(created_warmups[0].choice_seed, created_warmups[1].choice_seed)
+        for created_warmup in created_warmups:
+            self.assertTrue(movements.replay_warmup(created_warmup)["matches"])
+
+        created_warmup = created_warmups[1]
+
+        result = self.app.test_cli_runner().invoke(args=["replay-warmup", str(created_warmup.id)])
+        self.assertIn("matches the recorded warm-up", result.output)
+
+        self.app.config.update(WARMUP_SEED=42)
+        try:
+            seeds = [movements.get_seed(["Snatch", "Running"]), movements.get_seed(["Running", "Snatch"])]
+            self.assertEqual(seeds[0], seeds[1])
+            self.assertNotEqual(seeds[0], movements.get_seed(["Snatch"]))
+        finally:
+            self.app.config.update(WARMUP_SEED=None)
+
+    def test_unknown_movements(self):
+        '''validates every unknown movement is marked in one submission
+        and no warm-up is created'''
+        upload_test_movements(self.test_client)
+
+        response = self.test_client.post("/", data={"moves-0-move": "snatch", "moves-1-move": "Burpee", 
+                                                    "moves-2-move": "Box Jump"})
+        soup = bs4.BeautifulSoup(response.data, "html.parser")
+        invalid = [field["name"] for field in soup.find_all("input", class_="is-invalid")]
+        self.assertEqual(invalid, ["moves-1-move", "moves-2-move"])
+        self.assertEqual(CreatedWarmup.query.count(), 0)
+
+    def test_warmup_cache(self):
+        '''validates repeated workout selections are served from the
+        warm-up cache'''
+        with self.app_context:
+            models.create_movement_types()
+
+        upload_test_movements(self.test_client)
+        warmup_cache.clear()
+
+        self.test_client.post("/", data={"moves-0-move": "Snatch", "moves-1-move": "Running"})
+        self.test_client.post("/", data={"moves-0-move": "Running", "moves-1-move": "Snatch"})
+        response = self.test_client.post("/", data={"moves-0-move": "Running", "moves-1-move": "Snatch"})
+        soup = bs4.BeautifulSoup(response.data, "html.parser")
+        self.assertTrue(soup.find(id="warmup").find_all("li"))
+
+        stats = warmup_cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["size"]), (2, 1, 1))
+        self.assertEqual(CreatedWarmup.query.count(), 3)
+
+        solved, cached = CreatedWarmup.query.order_by(CreatedWarmup.id).limit(2).all()
+        self.assertGreater(solved.nodes_expanded, 0)
+        self.assertIsNone(cached.nodes_expanded)
+        self.assertTrue({"validate", "cache", "solve", "supersets", "render"}.issubset(
+            span.name for span in solved.spans))
+        self.assertNotIn("solve", [span.name for span in cached.spans])
+
+    def test_warmup_cache_ttl(self):
+        '''validates cache hits don't extend the expiry of an entry'''
+        with self.app_context:
+            models.create_movement_types()
+
+        upload_test_movements(self.test_client)
+        warmup_cache.clear()
+        warmup_cache.ttl = 10
+        try:
+            with mock.patch("sidekik.cache.time") as clock:
+                for now in [0, 6, 11]:
+                    clock.monotonic.return_value = now
+                    self.test_client.post("/", data={"moves-0-move": "Snatch"})
+        finally:
+            warmup_cache.ttl = self.app.config["WARMUP_CACHE_TTL"]
+
+        stats = warmup_cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 2))
+
     def test_warmup_suggestion(self):
         '''validates <= 3 movements suggested for 1 workout movement 
         provided, and > 3 mocements suggested for > 1 workout movement'''
@@ -69,20 +228,8 @@ class TestIndex(unittest.TestCase):
         with self.app_context:
             models.create_movement_types()
 
-        #add movements
-        fpath = path.join(path.abspath(path.dirname(__file__)), "test_movements.csv")
-        test_csv = datastructures.FileStorage(stream=open(fpath, "rb"), filename="test_movements.csv",
-                                              content_type="text/csv")
-        self.test_client.post("/admin/upload/movements/", data={"fmoves": test_csv}, 
-                              content_type="multipart/form-data")
-
-        #add movement categories
-        desc_fpath = path.join(path.abspath(path.dirname(__file__)), "test_movement_description.csv")
-        desc_csv = datastructures.FileStorage(stream=open(desc_fpath, "rb"), 
-                                              filename="test_movement_description.csv", 
-                                              content_type="text/csv")
-        response = self.test_client.post("/admin/upload/categories/", data={"fmoves": desc_csv}, 
-                                         content_type="multipart/form-data")
+        #add movements and movement categories
+        response = upload_test_movements(self.test_client)
         self.assertIn(b"Movement descriptions uploaded", response.data)
 
         #test warm-up creation
@@ -118,6 +265,22 @@ def add_to_db(app_context, row) -> None:
         db.session.add(row)
         db.session.commit()
 
+def upload_test_movements(test_client):
+    '''uploads test movements and movement categories, returning the
+    categories upload response'''
+    fpath = path.join(path.abspath(path.dirname(__file__)), "test_movements.csv")
+    test_csv = datastructures.FileStorage(stream=open(fpath, "rb"), filename="test_movements.csv",
+                                          content_type="text/csv")
+    test_client.post("/admin/upload/movements/", data={"fmoves": test_csv}, 
+                     content_type="multipart/form-data")
+
+    desc_fpath = path.join(path.abspath(path.dirname(__file__)), "test_movement_description.csv")
+    desc_csv = datastructures.FileStorage(stream=open(desc_fpath, "rb"), 
+                                          filename="test_movement_description.csv", 
+                                          content_type="text/csv")
+    return test_client.post("/admin/upload/categories/", data={"fmoves": desc_csv}, 
+                            content_type="multipart/form-data")
+
 
 if __name__ == "__main__":
     unittest.main()
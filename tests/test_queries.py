@@ -0,0 +1,145 @@
+'''Query count tests for app and admin endpoints'''
+import contextlib
+import shutil
+import tempfile
+import unittest
+
+import sidekik
+from sidekik import catalogue, config, db, models, warmup_cache
+from sidekik.models import CreatedWarmup, MoveType, Warmup, Workout
+
+
+#max SQL statements per request, as (method, url): budget, including 2 loading the logged in user
+QUERY_BUDGETS = {
+    ("GET", "/"): 0,
+    ("POST", "/"): 4,
+    ("GET", "/api/workouts/suggest?q=work"): 0,
+    ("POST", "/api/warmups"): 4,
+    ("GET", "/admin/"): 0,
+    ("GET", "/admin/createdwarmup/"): 4,
+    ("GET", "/admin/createdwarmup/details/?id=1"): 4,
+    ("GET", "/admin/user/"): 2,
+    ("GET", "/admin/warmup/"): 2,
+    ("GET", "/admin/warmup/edit/?id=1"): 5,
+    ("GET", "/admin/workout/"): 2,
+    ("GET", "/admin/workout/edit/?id=1"): 5
+}
+
+
+class TestQueries(unittest.TestCase):
+    '''Test class for SQL statements issued per request'''
+    #setup
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_dpath = tempfile.mkdtemp()
+        cls.config = config.TestConfig
+        cls.config.SQLALCHEMY_DATABASE_URI = cls.config.SQLALCHEMY_DATABASE_URI.format(
+            temp_dpath=cls.temp_dpath
+        )
+
+        cls.app = sidekik.create_app(cls.config)
+        cls.app_context = cls.app.app_context()
+        cls.app_context.push()
+        cls.test_client = cls.app.test_client()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.app_context.pop()
+        shutil.rmtree(cls.temp_dpath)
+
+    def setUp(self):
+        with self.app_context:
+            db.create_all()
+            models.create_movement_types()
+
+        sup_role = models.Role(name="Superuser", description="N/A")
+        con_role = models.Role(name="Contributor", description="N/A")
+        user = models.User(email="dummy_user@email.com", roles=[sup_role, con_role])
+        user.set_password("DummyPassword123")
+        db.session.add(user)
+        db.session.commit()
+
+        self.test_client.post("/admin/login", data={"email": "dummy_user@email.com", 
+                                                    "password": "DummyPassword123"})
+
+    def tearDown(self):
+        self.test_client.get("/admin/logout")
+
+        with self.app_context:
+            db.session.remove()
+            db.drop_all()
+
+        catalogue.invalidate()
+        warmup_cache.clear()
+
+    #unit tests
+    def test_query_budgets(self):
+        '''validates each endpoint stays within its statement budget and
+        issues the same statements as the catalogue doubles'''
+        add_catalogue(0, 10)
+        counts = measure_requests(self.test_client)
+
+        add_catalogue(10, 20)
+        catalogue.invalidate()
+        warmup_cache.clear()
+        doubled = measure_requests(self.test_client)
+
+        for request, budget in QUERY_BUDGETS.items():
+            with self.subTest(request=request):
+                self.assertLessEqual(counts[request], budget)
+                self.assertEqual(doubled[request], counts[request])
+
+
+#helper functions
+def add_catalogue(start: int, stop: int) -> None:
+    '''adds labelled warm-ups and workouts numbered start to stop, each
+    workout linked to five warm-ups, and a created warm-up for each'''
+    move_types = MoveType.query.order_by(MoveType.name).all()
+    warmups = [Warmup(name=f"Warm {ix}", move_types=[move_types[ix % len(move_types)]])
+               for ix in range(start, stop)]
+    for ix in range(start, stop):
+        workout = Workout(name=f"Work {ix}", move_types=move_types[:2], 
+                          warmups=[warmups[(ix - start + jx) % len(warmups)] for jx in range(5)])
+        db.session.add(CreatedWarmup(ex_time=0.1, workouts=[workout], warmups=workout.warmups))
+    db.session.commit()
+
+def measure_requests(test_client) -> dict:
+    '''returns SQL statements issued by each request in QUERY_BUDGETS,
+    after one unmeasured request to warm caches and with an empty
+    session, as the test app context outlives requests'''
+    counts = {}
+    for method, url in QUERY_BUDGETS:
+        kwargs = {}
+        if (method, url) == ("POST", "/"):
+            kwargs = {"data": {"moves-0-move": "Work 1", "moves-1-move": "Work 2"}}
+        elif (method, url) == ("POST", "/api/warmups"):
+            kwargs = {"json": {"workouts": ["Work 1", "Work 2"]}}
+
+        test_client.open(url, method=method, **kwargs)
+        warmup_cache.clear()
+        db.session.remove()
+        with count_queries() as count:
+            response = test_client.open(url, method=method, **kwargs)
+        assert response.status_code == 200, (method, url, response.status_code)
+        counts[(method, url)] = count[0]
+
+    return counts
+
+@contextlib.contextmanager
+def count_queries():
+    '''yields a one item list counting SQL statements executed in the
+    with block'''
+    count = [0]
+
+    def increment(*args):
+        count[0] += 1
+
+    db.event.listen(db.engine, "before_cursor_execute", increment)
+    try:
+        yield count
+    finally:
+        db.event.remove(db.engine, "before_cursor_execute", increment)
+
+
+if __name__ == "__main__":
+    unittest.main()
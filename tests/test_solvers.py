@@ -0,0 +1,163 @@
+'''Unit tests for warm-up solver engines'''
+import itertools
+import pandas as pd
+import random
+import unittest
+
+from sidekik import movements, solvers, spans
+
+
+class TestSolvers(unittest.TestCase):
+    '''test class for warm-up solver engines'''
+    #setup
+    def setUp(self):
+        self.df = random_frame(random.Random(0), n_rows=12, n_types=6)
+
+    #unit tests
+    def test_encode_coverage(self):
+        '''validates row and column masks match df'''
+        df = pd.DataFrame([{"name": "A", "Push": 1}, {"name": "B", "Pull": 1, "Push": 1}]).set_index("name")
+        coverage = solvers.encode_coverage(df)
+
+        self.assertEqual(coverage.names, ("A", "B"))
+        self.assertEqual(coverage.types, ("Push", "Pull"))
+        self.assertEqual(coverage.row_masks, (0b01, 0b11))
+        self.assertEqual(coverage.col_masks, (0b11, 0b10))
+        self.assertTrue(coverage.to_frame().equals(df.astype(float)))
+
+    def test_bitset_matches_pandas(self):
+        '''validates bitset engine returns the same warm-ups as the
+        pandas engine for the same random state'''
+        for seed in range(10):
+            df = random_frame(random.Random(seed), n_rows=15, n_types=7)
+
+            expected = movements.create_warmups(df, max_moves=5, rng=random.Random(seed))
+            self.assertEqual(solvers.create_warmups(df, max_moves=5, rng=random.Random(seed)), expected)
+
+    def test_seeded_solvers(self):
+        '''validates every engine replays the same warm-ups and nodes
+        expanded for the same seed'''
+        df = random_frame(random.Random(1), n_rows=20, n_types=6)
+        coverage = solvers.encode_coverage(df)
+
+        for engine in ["pandas", "bitset", "exact"]:
+            runs = []
+            for _ in range(3):
+                with spans.collect() as recorder:
+                    warm_options = movements.get_solver(engine)(coverage, max_moves=5, rng=random.Random(7))
+                runs.append((warm_options, recorder.counters["nodes_expanded"]))
+            self.assertEqual(runs[1:], runs[:1]*2)
+
+    def test_nodes_expanded(self):
+        '''validates every engine counts nodes expanded and times
+        superset removal only while collecting spans'''
+        coverage = solvers.encode_coverage(self.df)
+        for engine in ["pandas", "bitset", "exact"]:
+            with spans.collect() as recorder:
+                movements.get_solver(engine)(coverage, max_moves=5)
+            self.assertGreater(recorder.counters["nodes_expanded"], 0)
+            self.assertIn("supersets", recorder.spans)
+
+        with spans.collect(enabled=False) as recorder:
+            solvers.search_bitset(coverage, max_moves=5)
+        self.assertIsNone(recorder)
+        self.assertEqual(spans.record_fields(recorder), {})
+
+    def test_underscore_names(self):
+        '''validates movement names containing underscores are returned
+        intact by every engine'''
+        df = pd.DataFrame([{"name": "Band_Pull Apart", "Pull": 1}, {"name": "Air_Squat", "Squat": 1}])
+        df = df.set_index("name")
+
+        for engine in ["pandas", "bitset", "exact"]:
+            warm_options = movements.get_solver(engine)(solvers.encode_coverage(df), max_moves=5)
+            self.assertEqual(warm_options, [["Air_Squat", "Band_Pull Apart"]])
+
+    def test_warmups_cover_types(self):
+        '''validates every warm-up covers all movement types'''
+        for warmup in solvers.create_warmups(self.df, max_moves=5):
+            self.assertLessEqual(len(warmup), 5)
+            self.assertTrue((self.df.loc[warmup].sum() > 0).all())
+
+    def test_no_warmups(self):
+        '''validates RuntimeError raised when no cover exists'''
+        with self.assertRaises(RuntimeError):
+            solvers.create_warmups(self.df, max_moves=0)
+
+    def test_exact_minimum_covers(self):
+        '''validates exact engine returns every cover with the fewest
+        movements, found by brute force'''
+        for seed in range(10):
+            df = random_frame(random.Random(seed), n_rows=10, n_types=6)
+
+            expected = []
+            for n in range(1, 5):
+                expected = [sorted(rows) for rows in itertools.combinations(df.index, n)
+                            if (df.loc[list(rows)].sum() > 0).all()]
+                if expected:
+                    break
+
+            self.assertEqual(solvers.create_warmups_exact(df, max_moves=4), sorted(expected))
+
+    def test_remove_warmup_supersets(self):
+        '''validates superset removal matches the quadratic reference on
+        random warm-ups, keeping order and removing in place'''
+        rng = random.Random(0)
+        moves = [f"Movement {ix}" for ix in range(12)]
+
+        for _ in range(300):
+            warmups = [sorted(rng.choices(moves, k=rng.randint(1, 6))) for _ in range(rng.randint(0, 60))]
+            if rng.random() < 0.5:
+                warmups = sorted(warmup for warmup, _ in itertools.groupby(sorted(warmups)))
+
+            expected = reference_remove_warmup_supersets([list(warmup) for warmup in warmups])
+            result = movements.remove_warmup_supersets(warmups)
+            self.assertEqual(result, expected)
+            self.assertIs(result, warmups)
+
+    def test_remove_mask_supersets(self):
+        '''validates mask superset removal for masks above and below
+        the submask enumeration limit'''
+        masks = [0b0110, 0b0111, 0b1000, 0b1110, (1 << 20) - 1, (1 << 20) - 2, 1 << 21 | 0b0110]
+        self.assertEqual(solvers.remove_mask_supersets(masks), [0b0110, 0b1000])
+        self.assertEqual(solvers.remove_mask_supersets([(1 << 20) - 1, (1 << 20) - 2]), [(1 << 20) - 2])
+
+    def test_get_solver(self):
+        '''validates solver engines can be selected by name'''
+        self.assertIs(movements.get_solver("pandas"), movements.search_pandas)
+        self.assertIs(movements.get_solver("bitset"), solvers.search_bitset)
+        self.assertIs(movements.get_solver("exact"), solvers.search_exact)
+        with self.assertRaises(ValueError):
+            movements.get_solver("unknown")
+
+
+def reference_remove_warmup_supersets(warmups):
+    '''returns quadratic superset removal replaced by
+    movements.remove_warmup_supersets'''
+    counts = set(map(len, warmups))
+    count_dict = {n: [warmup for warmup in warmups if len(warmup) == n] for n in counts}
+
+    for i, j in [(i, j) for i in counts for j in counts if i > j]:
+        for lg_warmup in count_dict[i]:
+            if lg_warmup in warmups:
+                for sm_warmup in count_dict[j]:
+                    if set(lg_warmup).issuperset(sm_warmup):
+                        warmups.remove(lg_warmup)
+                        break
+
+    return warmups
+
+def random_frame(rng: random.Random, n_rows: int, n_types: int) -> pd.DataFrame:
+    '''returns warm-up DataFrame in the layout built by the index view'''
+    rows = []
+    for ix in range(n_rows):
+        row = {"name": f"Movement {ix}"}
+        row.update({f"Type {jx}": 1 for jx in rng.sample(range(n_types), rng.randint(1, 3))})
+        rows.append(row)
+
+    df = pd.DataFrame(rows).set_index("name")
+    return df.dropna(axis=0, how="all").dropna(axis=1, how="all")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+'''Unit tests for the created warm-up telemetry writer'''
+import shutil
+import queue
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import sidekik
+from sidekik import config, db, models, telemetry
+from sidekik.models import CreatedWarmup
+
+
+class TestTelemetry(unittest.TestCase):
+    '''test class for background telemetry writer'''
+    #setup
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_dpath = tempfile.mkdtemp()
+        cls.config = config.TestConfig
+        cls.config.SQLALCHEMY_DATABASE_URI = cls.config.SQLALCHEMY_DATABASE_URI.format(
+            temp_dpath=cls.temp_dpath
+        )
+
+        cls.app = sidekik.create_app(cls.config)
+        cls.app_context = cls.app.app_context()
+        cls.app_context.push()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.app_context.pop()
+        shutil.rmtree(cls.temp_dpath)
+
+    def setUp(self):
+        with self.app_context:
+            db.create_all()
+
+        self.workout = models.Workout(name="Thruster", warmups=[models.Warmup(name="Air Squat")])
+        db.session.add(self.workout)
+        db.session.commit()
+
+        self.app.config.update(TELEMETRY_ASYNC=True, TELEMETRY_FLUSH_INTERVAL=0.05, TELEMETRY_FLUSH_SIZE=2,
+                               TELEMETRY_QUEUE_SIZE=3)
+        self.writer = telemetry.TelemetryWriter()
+        self.writer.init_app(self.app)
+
+    def tearDown(self):
+        self.writer.shutdown()
+        self.app.config.update(TELEMETRY_ASYNC=False)
+
+        with self.app_context:
+            db.session.remove()
+            db.drop_all()
+
+    #unit tests
+    def test_background_flush(self):
+        '''validates queued records are written by the background
+        thread in batches'''
+        warm_id = self.workout.warmups[0].id
+        self.writer.record([{"work_ids": [self.workout.id], "warm_ids": [warm_id], "ex_time": 0.1, 
+                             "passed": True}, 
+                            {"work_ids": [self.workout.id], "passed": False}])
+
+        for _ in range(100):
+            if CreatedWarmup.query.count() == 2:
+                break
+            db.session.remove()
+            time.sleep(0.05)
+
+        rows = CreatedWarmup.query.order_by(CreatedWarmup.id).all()
+        self.assertEqual([row.passed for row in rows], [True, False])
+        self.assertEqual([row.name for row in rows[0].warmups], ["Air Squat"])
+        self.assertEqual([row.name for row in rows[1].workouts], ["Thruster"])
+
+    def test_batched_writes(self):
+        '''validates records arriving within flush_interval of the first
+        are drained in one batch of up to flush_size'''
+        self.app.config.update(TELEMETRY_FLUSH_INTERVAL=0.5, TELEMETRY_FLUSH_SIZE=3)
+        writer = telemetry.TelemetryWriter()
+        writer.init_app(self.app)
+        writer._queue = ArrivalQueue([0, 0.2, 0.4, 0.6, 0.7, 0.8, 0.9, 2])
+
+        with mock.patch.object(telemetry.time, "monotonic", lambda: writer._queue.now):
+            batches = [writer._drain(block=True) for _ in range(3)]
+
+        self.assertEqual(batches, [[0, 0.2, 0.4], [0.6, 0.7, 0.8], [0.9]])
+
+    def test_exit_registered_once(self):
+        '''validates shutdown registered to run at exit once per writer,
+        when its thread first starts'''
+        with mock.patch.object(telemetry.atexit, "register") as register:
+            self.writer.init_app(self.app)
+            self.assertEqual(register.call_count, 0)
+
+            for _ in range(2):
+                self.writer._start()
+                self.writer.shutdown()
+                self.writer.init_app(self.app)
+
+        register.assert_called_once_with(self.writer.shutdown)
+
+    def test_shutdown_flush(self):
+        '''validates full queue writes synchronously and shutdown
+        writes remaining records'''
+        self.writer._start = lambda: None
+        self.writer.record([{"work_ids": [self.workout.id], "passed": True} for _ in range(5)])
+        self.assertEqual(CreatedWarmup.query.count(), 2)
+
+        self.writer.shutdown()
+        db.session.remove()
+        self.assertEqual(CreatedWarmup.query.count(), 5)
+
+
+class ArrivalQueue():
+    '''Queue of records arriving at given times on a simulated clock,
+    advanced by the timeouts of blocking gets'''
+
+    def __init__(self, arrivals):
+        self.arrivals = list(arrivals)
+        self.now = 0
+
+    def get(self, block=True, timeout=None):
+        if self.arrivals and self.arrivals[0] <= self.now + (timeout if block else 0):
+            self.now = max(self.now, self.arrivals[0])
+            return self.arrivals.pop(0)
+
+        if block:
+            self.now += timeout
+        raise queue.Empty
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+
+if __name__ == "__main__":
+    unittest.main()
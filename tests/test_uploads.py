@@ -0,0 +1,169 @@
+'''Unit tests for the upload pipelines'''
+import io
+import pandas as pd
+import shutil
+import tempfile
+import unittest
+
+import sidekik
+from sidekik import config, db, models, uploads
+from sidekik.models import Warmup, Workout
+
+
+class TestUploads(unittest.TestCase):
+    '''Test class for set-based upload pipelines'''
+    #setup
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_dpath = tempfile.mkdtemp()
+        cls.config = config.TestConfig
+        cls.config.SQLALCHEMY_DATABASE_URI = cls.config.SQLALCHEMY_DATABASE_URI.format(
+            temp_dpath=cls.temp_dpath
+        )
+
+        cls.app = sidekik.create_app(cls.config)
+        cls.app_context = cls.app.app_context()
+        cls.app_context.push()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.app_context.pop()
+        shutil.rmtree(cls.temp_dpath)
+
+    def setUp(self):
+        with self.app_context:
+            db.create_all()
+
+    def tearDown(self):
+        with self.app_context:
+            db.session.remove()
+            db.drop_all()
+
+    #unit tests
+    def test_generate_unlabelled_csv(self):
+        '''validates distinct unlabelled movements streamed in name order
+        under the template header'''
+        push = models.MoveType(name="Push", description="N/A")
+        db.session.add_all([models.MoveType(name="Squat", description="N/A"), 
+                            Warmup(name="Wall Ball", move_types=[push]), Warmup(name="Air Squat"), 
+                            Warmup(name="Thruster, Light"), Workout(name="Thruster, Light"), 
+                            Workout(name="Burpee")])
+        db.session.commit()
+
+        chunks = list(uploads.generate_unlabelled_csv(chunk_size=2))
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual("".join(chunks), ('Movement,Push,Squat\nAir Squat,,\nBurpee,,\n'
+                                           '"Thruster, Light",,\n'))
+
+    def test_label_flags(self):
+        '''validates label flags refreshed on commit of ORM changes to
+        movements, their links and movement types'''
+        push = models.MoveType(name="Push", description="N/A")
+        warm_row = Warmup(name="Push-Up")
+        work_row = Workout(name="Thruster", warmups=[warm_row])
+        db.session.add(work_row)
+        db.session.commit()
+        self.assertEqual((warm_row.labelled, work_row.labelled, work_row.has_labelled_warmups), 
+                         (False, False, False))
+
+        warm_row.move_types.append(push)
+        db.session.commit()
+        self.assertEqual((warm_row.labelled, work_row.labelled, work_row.has_labelled_warmups), 
+                         (True, False, True))
+        self.assertEqual(models.refresh_labels(), 0)
+
+        db.session.delete(push)
+        db.session.commit()
+        self.assertEqual((warm_row.labelled, work_row.has_labelled_warmups), (False, False))
+
+    def test_normalize_movements(self):
+        '''validates distinct names normalized once, missing values kept
+        and name keys filled by bulk inserts'''
+        models.normalize_movement.cache_clear()
+        moves = pd.Series(["calf raises", "GHD sit-ups", None, "calf raises"])
+        self.assertEqual(models.normalize_movements(moves).fillna("").tolist(), 
+                         ["Calf Raise", "GHD Sit-Up", "", "Calf Raise"])
+        self.assertEqual(models.normalize_movement.cache_info().misses, 2)
+
+        uploads.insert_names(Warmup, ["GHD Sit-Up"])
+        self.assertEqual(Warmup.query.filter_by(name_key=models.movement_key(" ghd  sit-up")).one().name, 
+                         "GHD Sit-Up")
+
+    def test_upload_categories(self):
+        '''validates flagged movement types linked once to matching
+        warm-ups and workouts and existing links kept'''
+        push = models.MoveType(name="Push", description="N/A")
+        squat = models.MoveType(name="Squat", description="N/A")
+        db.session.add_all([Warmup(name="Overhead Squat", move_types=[push]), Workout(name="Thruster"),
+                            Warmup(name="Thruster")])
+        db.session.add(squat)
+        db.session.commit()
+
+        df = pd.DataFrame({"Movement": ["Overhead Squats", "thruster", "Unknown"], "Push": [1, 1, 1], 
+                           "Squat": [1, 1, None]})
+        summary = uploads.upload_categories([df])
+        self.assertEqual((summary["movements_matched"], summary["links_added"]), (2, 5))
+
+        warm_row = Warmup.query.filter_by(name="Overhead Squat").first()
+        self.assertEqual([row.name for row in warm_row.move_types], ["Push", "Squat"])
+        work_row = Workout.query.filter_by(name="Thruster").first()
+        self.assertEqual([row.name for row in work_row.move_types], ["Push", "Squat"])
+
+        self.assertTrue(work_row.labelled and work_row.has_labelled_warmups is False)
+        self.assertTrue(Warmup.query.filter_by(name="Thruster").one().labelled)
+
+        summary = uploads.upload_categories([df])
+        self.assertEqual(summary["links_added"], 0)
+
+        with self.assertRaises(uploads.UploadError):
+            uploads.upload_categories([df.iloc[:2], df.iloc[1:]])
+
+    def test_csv_upload(self):
+        '''validates header read first, UTF-8 rows read in batches and
+        undecodable files rejected'''
+        upload = uploads.CSVUpload(io.BytesIO("Snatch,Crêpe Jump\nA,B\nC,\nD,É\n".encode("utf-8")), 
+                                   batch_size=2)
+        self.assertEqual(upload.header, ["Snatch", "Crêpe Jump"])
+
+        batches = list(upload.batches())
+        self.assertEqual([len(batch) for batch in batches], [2, 1])
+        self.assertEqual(batches[1].iloc[0].tolist(), ["D", "É"])
+
+        upload = uploads.CSVUpload(io.BytesIO(b"Snatch,Running\n"))
+        self.assertEqual([batch.shape for batch in upload.batches()], [(0, 2)])
+
+        with self.assertRaises(uploads.UploadError):
+            uploads.CSVUpload(io.BytesIO("Crêpe Jump\n".encode("latin-1")))
+
+    def test_upload_movements(self):
+        '''validates names are parsed, existing rows and links reused and
+        only missing rows and links inserted'''
+        db.session.add(Workout(name="Snatch", warmups=[Warmup(name="Muscle Snatch")]))
+        db.session.commit()
+
+        df = pd.DataFrame({"snatch": ["muscle snatch", "Overhead Squats"], 
+                           "Running": ["Calf Raises", None]})
+        summary = uploads.upload_movements([df])
+        self.assertEqual((summary["workouts_added"], summary["warmups_added"], summary["links_added"]), 
+                         (1, 2, 2))
+        self.assertEqual(list(summary["timings"]), ["read", "parse", "fetch", "insert_movements", 
+                                                    "insert_links", "refresh_labels", "commit"])
+
+        snatch = Workout.query.filter_by(name="Snatch").first()
+        self.assertEqual([row.name for row in snatch.warmups], ["Muscle Snatch", "Overhead Squat"])
+        running = Workout.query.filter_by(name="Running").first()
+        self.assertEqual([row.name for row in running.warmups], ["Calf Raise"])
+
+        summary = uploads.upload_movements([df])
+        self.assertEqual((summary["workouts_added"], summary["warmups_added"], summary["links_added"]), 
+                         (0, 0, 0))
+        self.assertEqual(db.session.query(models.warm_work).count(), 3)
+
+    def test_chunked(self):
+        '''validates values split into slices of at most size'''
+        self.assertEqual(list(uploads.chunked(range(5), size=2)), [[0, 1], [2, 3], [4]])
+        self.assertEqual(list(uploads.chunked([], size=2)), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
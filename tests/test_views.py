@@ -4,7 +4,7 @@ import tempfile
 import unittest
 
 import sidekik
-from sidekik import config, db, models
+from sidekik import config, db, models, principal_cache
 
 
 class TestLogin(unittest.TestCase):
@@ -109,6 +109,29 @@ class TestLogin(unittest.TestCase):
         self.assertIn(b"Upload", response.data)
         self.assertIn(b"Created Warm-ups", response.data)        
 
+    def test_cached_principal(self):
+        '''validates logged in user served from principal cache and
+        dropped when the user is changed'''
+        email = "dummy_user@email.com"
+        phrase = "DummyPassword123"
+
+        user = models.User(email=email)
+        user.set_password(phrase)
+        add_to_db(self.app_context, user)
+
+        self.test_client.post("/admin/login", data={"email": email, "password": phrase})
+        self.test_client.get("/admin/")
+
+        principal = principal_cache.get(user.id)
+        self.assertIsInstance(principal, models.Principal)
+        self.assertEqual((principal.id, principal.roles), (user.id, frozenset()))
+        self.assertIs(models.load_user(str(user.id)), principal)
+
+        user.active = False
+        add_to_db(self.app_context, user)
+        self.assertIsNone(principal_cache.get(user.id))
+        self.assertFalse(models.load_user(str(user.id)).is_active)
+
 
 def add_to_db(app_context, row) -> None:
     '''adds row to db and commits'''